@@ -15,7 +15,7 @@ def main():
         print(f"\nGerando mapa no estilo {style}...")
         
         # Gera o mapa com WFC
-        map_data = generator.generate_map(style=style, use_wfc=True)
+        map_data, _ = generator.generate_map(style=style, use_wfc=True)
         
         # Visualiza o mapa
         plt.figure(figsize=(10, 10))
@@ -32,7 +32,7 @@ def main():
         
         # Gera o mapa sem WFC para comparação
         print(f"\nGerando mapa no estilo {style} (sem WFC)...")
-        map_data_no_wfc = generator.generate_map(style=style, use_wfc=False)
+        map_data_no_wfc, _ = generator.generate_map(style=style, use_wfc=False)
         
         # Visualiza o mapa sem WFC
         plt.figure(figsize=(10, 10))
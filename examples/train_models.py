@@ -1,5 +1,6 @@
 from map_generator import MapGenerator, GANModel, RLModel
 from map_generator.data.dataset_manager import DatasetManager
+import numpy as np
 import os
 
 def train_models():
@@ -34,7 +35,9 @@ def train_models():
     
     # Treina o modelo RL
     print("\nTreinando modelo RL para balanceamento")
-    experiences = []
+    original_maps = []
+    balanced_maps = []
+    difficulties = []
     
     # Gera experiências de treinamento
     for style in styles:
@@ -47,13 +50,16 @@ def train_models():
             # Testa diferentes níveis de dificuldade
             for difficulty in ['easy', 'medium', 'hard', 'very_hard']:
                 # Gera mapa balanceado
-                balanced_map = rl_model.balance_map(map_data, difficulty)
-                
-                # Calcula recompensa
-                reward = calculate_reward(map_data, balanced_map, difficulty)
-                
-                # Adiciona experiência
-                experiences.append((map_data, balanced_map, reward, balanced_map))
+                original_maps.append(map_data)
+                balanced_maps.append(rl_model.balance_map(map_data, difficulty))
+                difficulties.append(difficulty)
+    
+    # Calcula todas as recompensas de uma vez
+    rewards = calculate_rewards(np.array(balanced_maps), difficulties)
+    experiences = [
+        (map_data, balanced_map, reward, balanced_map)
+        for map_data, balanced_map, reward in zip(original_maps, balanced_maps, rewards)
+    ]
     
     # Treina o modelo RL
     rl_model.train(experiences, batch_size=32)
@@ -99,5 +105,31 @@ def calculate_reward(original_map, balanced_map, difficulty):
     
     return reward
 
+def calculate_rewards(balanced_maps, difficulties):
+    """
+    Calcula as recompensas para uma pilha de mapas balanceados de uma só vez.
+    
+    Args:
+        balanced_maps (numpy.ndarray): Mapas balanceados (N, H, W) ou (N, H, W, 1)
+        difficulties (list): Nível de dificuldade alvo de cada mapa
+        
+    Returns:
+        numpy.ndarray: Recompensas calculadas (N,)
+    """
+    from map_generator.utils.map_utils import calculate_difficulty_batch, validate_map_batch
+    
+    # Valores alvo de dificuldade
+    target_difficulties = {
+        'easy': 0.3,
+        'medium': 0.5,
+        'hard': 0.7,
+        'very_hard': 0.9
+    }
+    targets = np.array([target_difficulties[d] for d in difficulties])
+    
+    # Recompensa baseada na proximidade da dificuldade alvo; mapas não jogáveis recebem -1
+    rewards = 1.0 - np.abs(calculate_difficulty_batch(balanced_maps) - targets)
+    return np.where(validate_map_batch(balanced_maps), rewards, -1.0)
+
 if __name__ == "__main__":
     train_models() 
\ No newline at end of file
@@ -1,5 +1,14 @@
 from .map_generator import MapGenerator
-from .models.gan import GANModel
-from .models.rl import RLModel
+from .map_pool import MapPool
 
-__all__ = ['MapGenerator', 'GANModel', 'RLModel'] 
\ No newline at end of file
+__all__ = ['MapGenerator', 'MapPool', 'GANModel', 'RLModel']
+
+def __getattr__(name):
+    # Os modelos importam o TensorFlow; só são carregados quando acessados
+    if name == 'GANModel':
+        from .models.gan import GANModel
+        return GANModel
+    if name == 'RLModel':
+        from .models.rl import RLModel
+        return RLModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,117 @@
+import numpy as np
+
+class CompiledForward:
+    """
+    Passo de inferência de uma rede Keras compilado com `tf.function`.
+
+    Cada shape de entrada tem o seu próprio `tf.function` com
+    `input_signature` fixa (lote 1), de modo que chamadas repetidas com o
+    mesmo tamanho de mapa reutilizam o grafo já traçado, sem retracing. Com
+    `jit_compile=True` o grafo é compilado com XLA na primeira execução.
+
+    Depois de `install`, as chamadas a `network.predict` com lote 1 passam
+    pelo grafo compilado; as demais (por exemplo, no treinamento) continuam
+    usando o `predict` original do Keras.
+    """
+
+    def __init__(self, network, jit_compile=False):
+        """
+        Args:
+            network (keras.Model): Rede usada na inferência
+            jit_compile (bool): Se True, compila os grafos com XLA
+        """
+        self.network = network
+        self.jit_compile = jit_compile
+        self._predict = network.predict
+        self._functions = {}
+
+    @classmethod
+    def install(cls, network, jit_compile=False):
+        """
+        Substitui `network.predict` pela versão compilada.
+
+        Args:
+            network (keras.Model, optional): Rede a compilar
+            jit_compile (bool): Se True, compila os grafos com XLA
+
+        Returns:
+            CompiledForward | None: Wrapper instalado, ou None se não houver rede
+        """
+        if network is None:
+            return None
+        compiled = cls(network, jit_compile)
+        network.predict = compiled.predict
+        return compiled
+
+    def input_shapes(self, height=None, width=None):
+        """
+        Shapes de entrada com lote 1, preenchendo altura e largura livres.
+
+        Args:
+            height (int, optional): Altura usada nas entradas espaciais sem tamanho fixo
+            width (int, optional): Largura usada nas entradas espaciais sem tamanho fixo
+
+        Returns:
+            list | None: Shape de cada entrada, ou None se algum eixo ficar indefinido
+        """
+        shapes = []
+        for tensor in self.network.inputs:
+            shape = [1] + list(tensor.shape[1:])
+            if len(shape) == 4:
+                shape[1] = shape[1] if shape[1] is not None else height
+                shape[2] = shape[2] if shape[2] is not None else width
+            if any(dim is None for dim in shape):
+                return None
+            shapes.append(tuple(shape))
+        return shapes
+
+    def function(self, input_shapes):
+        """
+        Retorna o `tf.function` das shapes informadas, criando-o se necessário.
+
+        Args:
+            input_shapes (list): Shape de cada entrada (lote 1)
+
+        Returns:
+            tf.types.experimental.GenericFunction: Função com assinatura fixa
+        """
+        import tensorflow as tf
+
+        key = tuple(tuple(int(dim) for dim in shape) for shape in input_shapes)
+        if key not in self._functions:
+            network = self.network
+
+            def forward(*inputs):
+                return network(inputs[0] if len(inputs) == 1 else list(inputs), training=False)
+
+            self._functions[key] = tf.function(
+                forward, input_signature=[tf.TensorSpec(shape, tf.float32) for shape in key],
+                jit_compile=self.jit_compile
+            )
+        return self._functions[key]
+
+    def warmup(self, input_shapes):
+        """
+        Traça o grafo das shapes informadas e o executa uma vez (compilando-o com XLA, se ativo).
+
+        Args:
+            input_shapes (list): Shape de cada entrada (lote 1)
+        """
+        function = self.function(input_shapes)
+        function.get_concrete_function()
+        function(*[np.zeros(shape, dtype=np.float32) for shape in input_shapes])
+
+    def __call__(self, *inputs):
+        """Executa a rede pelo grafo compilado da shape das entradas."""
+        inputs = [np.asarray(x, dtype=np.float32) for x in inputs]
+        outputs = self.function([x.shape for x in inputs])(*inputs)
+        if isinstance(outputs, (list, tuple)):
+            return [np.asarray(output) for output in outputs]
+        return np.asarray(outputs)
+
+    def predict(self, x, *args, **kwargs):
+        """Substituto de `keras.Model.predict`: usa o grafo compilado para lotes de 1 mapa."""
+        inputs = list(x) if isinstance(x, (list, tuple)) else [x]
+        if all(np.ndim(value) > 0 and np.shape(value)[0] == 1 for value in inputs):
+            return self(*inputs)
+        return self._predict(x, *args, **kwargs)
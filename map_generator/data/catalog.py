@@ -0,0 +1,321 @@
+import os
+import numpy as np
+from .shards import ShardWriter, ShardReader
+from ..utils.map_descriptor import MapDescriptor
+from ..utils.map_utils import calculate_difficulty_batch
+
+class MapCatalog:
+    """
+    Catálogo de mapas pré-gerados, indexado por estilo, dificuldade e conteúdo.
+
+    Os mapas ficam em um diretório de shards (ver `ShardWriter`). Para cada
+    mapa são guardadas a dificuldade (`calculate_difficulty`) e a frequência
+    de cada elemento do estilo (`MapDescriptor.analyze_map`), em um arquivo
+    binário de features acrescentado junto com os shards.
+
+    Em memória, os mapas de cada estilo ficam ordenados pela dificuldade,
+    com as frequências na mesma ordem: uma busca por faixa de dificuldade é
+    um par de buscas binárias seguido de um filtro vetorizado sobre uma fatia
+    contígua, e a busca pelo mais próximo expande uma janela em torno da
+    posição da dificuldade pedida.
+    """
+
+    FEATURES_FILE = 'features.bin'
+
+    def __init__(self, directory, **writer_kwargs):
+        """
+        Abre (ou cria) um catálogo.
+
+        Args:
+            directory (str): Diretório do catálogo
+            **writer_kwargs: Argumentos extras de `ShardWriter` usados na
+                criação (shape, dtype, shard_size, quantize)
+        """
+        self.directory = directory
+        self.writer_kwargs = writer_kwargs
+        self.descriptor = MapDescriptor()
+        # Dificuldade seguida das frequências dos elementos
+        self.num_features = 1 + max(len(description['elements'])
+                                    for description in self.descriptor.style_descriptions.values())
+        self._features_path = os.path.join(directory, self.FEATURES_FILE)
+
+        self._writer = None
+        self._features_file = None
+        self.reader = None
+        self._features = None
+        self._index = {}
+        self._stale = True
+
+    def _compute_features(self, maps, style):
+        """Features (N, num_features) de mapas de um estilo: dificuldade e frequências."""
+        features = np.zeros((len(maps), self.num_features), dtype=np.float32)
+        features[:, 0] = calculate_difficulty_batch(maps)
+        frequencies = self.descriptor.analyze_map_batch(maps, style)
+        features[:, 1:1 + frequencies.shape[1]] = frequencies
+        return features
+
+    def _read_features(self, reader):
+        """
+        Lê as features dos mapas de `reader`.
+
+        Linhas além do número de mapas (escrita interrompida) são ignoradas;
+        mapas sem linha têm as features recalculadas a partir dos mapas salvos.
+
+        Returns:
+            tuple: (features (N, num_features), número de linhas recalculadas)
+        """
+        if os.path.exists(self._features_path):
+            features = np.fromfile(self._features_path, dtype=np.float32)
+        else:
+            features = np.zeros(0, dtype=np.float32)
+        rows = min(len(features) // self.num_features, len(reader))
+        features = features[:rows * self.num_features].reshape(rows, self.num_features)
+        if rows == len(reader):
+            return features, 0
+
+        print(f"{self.FEATURES_FILE} tem {rows} de {len(reader)} linhas; recalculando as features restantes")
+        ids = np.arange(rows, len(reader))
+        styles = reader.styles[ids].astype(str)
+        missing = np.zeros((len(ids), self.num_features), dtype=np.float32)
+        for style in np.unique(styles):
+            mask = styles == style
+            missing[mask] = self._compute_features(reader.get_batch(ids[mask]), style)
+        return np.concatenate([features, missing]), len(ids)
+
+    def _open_writer(self):
+        """Abre o catálogo para escrita, alinhando o arquivo de features aos mapas."""
+        if self._writer is None:
+            self._writer = ShardWriter(self.directory, **self.writer_kwargs)
+            row_size = self.num_features * np.dtype(np.float32).itemsize
+            features, recomputed = (self._read_features(ShardReader(self.directory)) if len(self._writer)
+                                    else (np.zeros((0, self.num_features), dtype=np.float32), 0))
+            # Sem buffer: cada linha chega ao arquivo antes de o meta.json contar o mapa
+            self._features_file = open(self._features_path, 'ab', buffering=0)
+            self._features_file.truncate((len(features) - recomputed) * row_size)
+            if recomputed:
+                self._features_file.write(features[-recomputed:].tobytes())
+        return self._writer
+
+    def _load(self):
+        """Relê os shards e reconstrói o índice de cada estilo."""
+        self._index = {}
+        self._stale = False
+        if not os.path.exists(os.path.join(self.directory, 'meta.json')):
+            self.reader = None
+            return
+
+        self.reader = ShardReader(self.directory)
+        features, _ = self._read_features(self.reader)
+        self._features = features
+
+        styles, codes = np.unique(self.reader.styles.astype(str), return_inverse=True)
+        for code, style in enumerate(styles):
+            ids = np.flatnonzero(codes == code)
+            ids = ids[np.argsort(features[ids, 0], kind='stable')]
+            self._index[style] = (ids, np.ascontiguousarray(features[ids, 0]),
+                                  np.ascontiguousarray(features[ids, 1:]))
+
+    def _style_index(self, style):
+        """Retorna (ids, dificuldades, frequências) do estilo, ordenados pela dificuldade."""
+        if self._stale:
+            self._load()
+        empty = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32),
+                 np.zeros((0, self.num_features - 1), dtype=np.float32))
+        return self._index.get(style, empty)
+
+    def __len__(self):
+        if self._writer is not None:
+            return len(self._writer)
+        if self._stale:
+            self._load()
+        return len(self.reader) if self.reader is not None else 0
+
+    def add(self, maps, style, seeds=None, descriptions=None):
+        """
+        Acrescenta mapas de um estilo ao catálogo.
+
+        Os mapas passam a aparecer nas buscas depois de `flush` ou `close`.
+
+        Args:
+            maps (numpy.ndarray): Mapas de dificuldade (N, H, W) ou (N, H, W, 1)
+            style (str): Estilo dos mapas
+            seeds (list, optional): Semente de cada mapa
+            descriptions (list, optional): Descrição textual de cada mapa
+
+        Returns:
+            numpy.ndarray: Ids dos mapas no catálogo
+        """
+        maps = np.asarray(maps)
+        if style not in self.descriptor.style_descriptions:
+            raise ValueError(f"Estilo desconhecido: {style}")
+        for name, values in (('seeds', seeds), ('descriptions', descriptions)):
+            if values is not None and len(values) != len(maps):
+                raise ValueError(f"{name} tem {len(values)} itens para {len(maps)} mapas")
+        features = self._compute_features(maps, style)
+
+        writer = self._open_writer()
+        start = len(writer)
+        row_size = features.itemsize * self.num_features
+        self._stale = True
+        for i, map_data in enumerate(maps):
+            # A linha de features é gravada antes do mapa: o `append` pode
+            # atualizar o meta.json ao completar um shard
+            self._features_file.write(features[i].tobytes())
+            try:
+                writer.append(map_data, style=style, difficulty=float(features[i, 0]),
+                              seed=seeds[i] if seeds is not None else None,
+                              description=descriptions[i] if descriptions is not None else None)
+            except Exception:
+                self._features_file.truncate(len(writer) * row_size)
+                raise
+        return np.arange(start, start + len(maps))
+
+    def _matches(self, style, frequencies, features):
+        """
+        Máscara dos mapas cujas frequências estão nas faixas pedidas.
+
+        Args:
+            style (str): Estilo dos mapas
+            frequencies (numpy.ndarray): Frequências (N, número de elementos)
+            features (dict): Nome do elemento -> (mínimo, máximo), com None
+                para um limite aberto
+
+        Returns:
+            numpy.ndarray: Máscara booleana (N,)
+        """
+        names = self.descriptor.element_names(style)
+        mask = np.ones(len(frequencies), dtype=bool)
+        for name, (low, high) in features.items():
+            if name not in names:
+                raise ValueError(f"Elemento desconhecido para o estilo {style}: {name}")
+            column = frequencies[:, names.index(name)]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return mask
+
+    def find(self, style, min_difficulty=0.0, max_difficulty=1.0, features=None, limit=None):
+        """
+        Busca os mapas de um estilo em uma faixa de dificuldade.
+
+        Args:
+            style (str): Estilo dos mapas
+            min_difficulty (float): Dificuldade mínima
+            max_difficulty (float): Dificuldade máxima
+            features (dict, optional): Faixas de frequência por elemento, por
+                exemplo {'rios': (0.2, None)}
+            limit (int, optional): Número máximo de resultados
+
+        Returns:
+            numpy.ndarray: Ids dos mapas, em ordem crescente de dificuldade
+        """
+        ids, difficulties, frequencies = self._style_index(style)
+        start = np.searchsorted(difficulties, min_difficulty, side='left')
+        end = np.searchsorted(difficulties, max_difficulty, side='right')
+        result = ids[start:end]
+        if features:
+            result = result[self._matches(style, frequencies[start:end], features)]
+        return result[:limit]
+
+    def nearest(self, style, difficulty, k=1, features=None):
+        """
+        Busca os `k` mapas de um estilo com dificuldade mais próxima da pedida.
+
+        Args:
+            style (str): Estilo dos mapas
+            difficulty (float): Dificuldade desejada
+            k (int): Número de mapas
+            features (dict, optional): Faixas de frequência por elemento (ver `find`)
+
+        Returns:
+            numpy.ndarray: Ids dos mapas, do mais próximo ao mais distante
+                (menos de `k` se não houver mapas suficientes)
+                
+        Raises:
+            ValueError: Se `k` for menor que 1
+        """
+        if k < 1:
+            raise ValueError(f"k deve ser pelo menos 1, recebido {k}")
+        ids, difficulties, frequencies = self._style_index(style)
+        count = len(ids)
+        center = np.searchsorted(difficulties, difficulty)
+        window = max(4 * k, 64)
+        while True:
+            start, end = max(center - window, 0), min(center + window, count)
+            positions = np.arange(start, end)
+            if features:
+                positions = positions[self._matches(style, frequencies[start:end], features)]
+            distances = np.abs(difficulties[positions] - difficulty)
+            order = np.argsort(distances, kind='stable')[:k]
+            covered = start == 0 and end == count
+
+            # Fora da janela, nenhum mapa está mais perto que as suas bordas
+            if len(order) == k or covered:
+                bound = min(difficulty - difficulties[start - 1] if start > 0 else np.inf,
+                            difficulties[end] - difficulty if end < count else np.inf)
+                if covered or distances[order[-1]] <= bound:
+                    return ids[positions[order]]
+            window *= 4
+
+    def get(self, ids):
+        """
+        Carrega mapas do catálogo.
+
+        Args:
+            ids (array-like): Ids dos mapas
+
+        Returns:
+            numpy.ndarray: Mapas empilhados, na ordem de `ids`
+            
+        Raises:
+            IndexError: Se o catálogo estiver vazio
+        """
+        if self._stale:
+            self._load()
+        if self.reader is None:
+            raise IndexError("Catálogo vazio")
+        return self.reader.get_batch(ids)
+
+    def metadata(self, map_id):
+        """
+        Retorna os metadados e as features de um mapa.
+
+        Returns:
+            dict: style, difficulty (pontuação), seed, description e a
+                frequência de cada elemento
+                
+        Raises:
+            IndexError: Se o catálogo estiver vazio
+        """
+        if self._stale:
+            self._load()
+        if self.reader is None:
+            raise IndexError("Catálogo vazio")
+        entry = self.reader.metadata(map_id)
+        names = self.descriptor.element_names(entry['style'])
+        entry['elements'] = {name: float(self._features[map_id, 1 + i]) for i, name in enumerate(names)}
+        return entry
+
+    def flush(self):
+        """Grava os mapas acrescentados, tornando-os visíveis nas buscas."""
+        if self._writer is not None:
+            # As features vão para o disco antes do meta.json que as valida
+            self._features_file.flush()
+            self._writer.flush()
+        self._stale = True
+
+    def close(self):
+        """Grava os dados pendentes e fecha o catálogo para escrita."""
+        if self._writer is not None:
+            self._features_file.close()
+            self._writer.close()
+            self._writer = None
+            self._features_file = None
+        self._stale = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+class DatasetCache:
+    """
+    Cache em disco de mapas pré-processados.
+
+    Cada conjunto é salvo como um único arquivo `.npy` contíguo (N, H, W),
+    acompanhado de um manifesto JSON com o caminho, a data de modificação,
+    o tamanho e o hash SHA-1 de cada arquivo de origem. O carregamento usa
+    memory-mapping e apenas arquivos novos ou alterados são reprocessados.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, cache_dir="data/cache", map_shape=(32, 32), dtype=np.float32):
+        self.cache_dir = cache_dir
+        self.map_shape = tuple(map_shape)
+        self.dtype = np.dtype(dtype)
+
+    def _paths(self, name):
+        """Retorna os caminhos do arquivo de dados e do manifesto de um conjunto."""
+        base = os.path.join(self.cache_dir, name)
+        return base + '.npy', base + '.json'
+
+    @staticmethod
+    def _file_hash(file_path):
+        """Calcula o hash SHA-1 do conteúdo de um arquivo."""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _read_manifest(self, name):
+        """Lê o manifesto de um conjunto, ou None se ausente ou incompatível."""
+        data_path, manifest_path = self._paths(name)
+        if not (os.path.exists(data_path) and os.path.exists(manifest_path)):
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (manifest.get('version') != self.MANIFEST_VERSION or
+                tuple(manifest.get('shape', ())) != self.map_shape or
+                manifest.get('dtype') != self.dtype.str):
+            return None
+        return manifest
+
+    def load(self, name, mmap_mode='r'):
+        """
+        Carrega um conjunto do cache usando memory-mapping.
+
+        Args:
+            name (str): Nome do conjunto (por exemplo, o estilo)
+            mmap_mode (str): Modo do memory-mapping ('r', 'r+' ou 'c')
+
+        Returns:
+            numpy.ndarray: Mapas (N, H, W), ou None se o cache não existir
+        """
+        if self._read_manifest(name) is None:
+            return None
+        data_path, _ = self._paths(name)
+        return np.load(data_path, mmap_mode=mmap_mode)
+
+    def update(self, name, file_paths, load_fn):
+        """
+        Atualiza o cache de um conjunto, reprocessando apenas os arquivos alterados.
+
+        Um arquivo é reaproveitado quando a data de modificação e o tamanho
+        não mudaram, ou quando mudaram mas o hash do conteúdo é o mesmo.
+
+        Args:
+            name (str): Nome do conjunto (por exemplo, o estilo)
+            file_paths (list): Arquivos de origem, na ordem desejada
+            load_fn (callable): Função que recebe uma lista de arquivos e retorna
+                (maps, errors), como `DatasetManager.load_maps`
+
+        Returns:
+            numpy.ndarray: Mapas (N, H, W) em memory-mapping somente leitura
+        """
+        data_path, manifest_path = self._paths(name)
+        manifest = self._read_manifest(name)
+        old_entries = {}
+        old_failed = {}
+        old_data = None
+        if manifest is not None:
+            old_entries = {entry['path']: (row, entry)
+                           for row, entry in enumerate(manifest['files'])}
+            old_failed = {entry['path']: entry for entry in manifest.get('failed', [])}
+            old_data = np.load(data_path, mmap_mode='r')
+
+        entries = []
+        sources = []  # Linha do cache antigo a reaproveitar, ou None para decodificar
+        failed = []
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            entry = {'path': file_path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            row, old_entry = old_entries.get(file_path, (None, None))
+
+            # Arquivos que já falharam e não mudaram não são tentados de novo
+            if old_failed.get(file_path) == entry:
+                failed.append(entry)
+                continue
+
+            if old_entry is not None and (old_entry['mtime_ns'], old_entry['size']) == (entry['mtime_ns'], entry['size']):
+                entry['sha1'] = old_entry['sha1']
+            else:
+                entry['sha1'] = self._file_hash(file_path)
+                if old_entry is None or old_entry['sha1'] != entry['sha1']:
+                    row = None
+            entries.append(entry)
+            sources.append(row)
+
+        # Nada mudou: reaproveita o arquivo existente
+        if (manifest is not None and None not in sources and
+                sources == list(range(len(manifest['files'])))):
+            if entries != manifest['files'] or failed != manifest.get('failed', []):
+                self._write_manifest(manifest_path, entries, failed)
+            return self.load(name)
+
+        # Decodifica os arquivos novos ou alterados
+        pending = [index for index, row in enumerate(sources) if row is None]
+        maps, errors = load_fn([entries[index]['path'] for index in pending])
+        decoded = {index: map_data for index, map_data in zip(pending, maps)
+                   if map_data is not None}
+        for index in pending:
+            if index not in decoded:
+                failed.append({key: entries[index][key] for key in ('path', 'mtime_ns', 'size')})
+        if errors:
+            print(f"Erro ao carregar {len(errors)} arquivo(s) para o cache '{name}'")
+        keep = [i for i, row in enumerate(sources) if row is not None or i in decoded]
+
+        # Escreve o novo arquivo contíguo e substitui o antigo de forma atômica
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = data_path + '.tmp.npy'
+        data = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype,
+                                         shape=(len(keep),) + self.map_shape)
+        for out_row, index in enumerate(keep):
+            row = sources[index]
+            data[out_row] = old_data[row] if row is not None else decoded[index]
+        data.flush()
+        del data, old_data
+        os.replace(tmp_path, data_path)
+        self._write_manifest(manifest_path, [entries[i] for i in keep], failed)
+
+        print(f"Cache '{name}' atualizado: {len(decoded)} mapas processados, "
+              f"{len(keep) - len(decoded)} reaproveitados")
+        return self.load(name)
+
+    def _write_manifest(self, manifest_path, entries, failed):
+        """Escreve o manifesto de forma atômica."""
+        manifest = {
+            'version': self.MANIFEST_VERSION,
+            'shape': list(self.map_shape),
+            'dtype': self.dtype.str,
+            'files': entries,
+            'failed': failed
+        }
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
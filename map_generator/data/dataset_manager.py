@@ -1,11 +1,20 @@
 import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
+from scipy.ndimage import gaussian_filter
 from sklearn.model_selection import train_test_split
+from .dataset_cache import DatasetCache
+from .streaming import hash_split, shuffle_buffer, batch, prefetch
+from .shards import ShardReader
 
 class DatasetManager:
-    def __init__(self, data_dir="data/maps"):
+    def __init__(self, data_dir="data/maps", cache_dir="data/cache", num_workers=None, map_size=(32, 32)):
         self.data_dir = data_dir
+        self.map_size = tuple(map_size)  # (altura, largura)
+        self.cache = DatasetCache(cache_dir, map_shape=self.map_size)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.load_errors = []
         self.styles = {
             'dungeon': {'path': 'dungeon', 'difficulty_range': (0.4, 0.8)},
             'open_world': {'path': 'open_world', 'difficulty_range': (0.2, 0.6)},
@@ -14,28 +23,98 @@ class DatasetManager:
             'sci_fi': {'path': 'sci_fi', 'difficulty_range': (0.4, 0.8)}
         }
         
-    def load_map(self, file_path):
-        """Carrega um mapa de um arquivo de imagem."""
+    def load_map(self, file_path, size=None):
+        """Carrega um mapa de um arquivo de imagem, redimensionado para `size` (altura, largura)."""
+        height, width = size or self.map_size
         img = Image.open(file_path).convert('L')
-        # Redimensiona para 32x32 pixels
-        img = img.resize((32, 32), Image.Resampling.LANCZOS)
+        # Redimensiona para o tamanho dos mapas (32x32 por padrão)
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
         return np.array(img) / 255.0
     
-    def load_dataset(self, style, split_ratio=0.8):
-        """Carrega o dataset para um estilo específico."""
+    def list_map_files(self, style):
+        """Lista os arquivos de imagem de um estilo, em ordem alfabética."""
         style_dir = os.path.join(self.data_dir, self.styles[style]['path'])
-        maps = []
+        with os.scandir(style_dir) as entries:
+            return sorted(entry.path for entry in entries
+                          if entry.is_file() and entry.name.endswith(('.png', '.jpg')))
+    
+    def _try_load_map(self, file_path):
+        """Carrega um mapa, retornando (mapa, None) ou (None, erro)."""
+        try:
+            return self.load_map(file_path), None
+        except Exception as e:
+            return None, e
+    
+    def load_maps(self, file_paths):
+        """
+        Carrega vários mapas em paralelo, preservando a ordem dos arquivos.
+        
+        A decodificação e o redimensionamento do PIL liberam o GIL na maior
+        parte do tempo, então um pool de threads escala com o número de núcleos.
+        
+        Args:
+            file_paths (list): Arquivos a serem carregados
+            
+        Returns:
+            tuple: (maps, errors) onde maps é uma lista alinhada com file_paths
+                (None para os arquivos que falharam) e errors é uma lista de
+                (caminho, exceção)
+        """
+        if self.num_workers > 1 and len(file_paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                results = list(executor.map(self._try_load_map, file_paths))
+        else:
+            results = [self._try_load_map(file_path) for file_path in file_paths]
+        
+        maps = [map_data for map_data, _ in results]
+        errors = [(file_path, error) for file_path, (_, error) in zip(file_paths, results)
+                  if error is not None]
+        return maps, errors
+    
+    def _report_errors(self, errors):
+        """Guarda os erros de carregamento e imprime um resumo."""
+        self.load_errors = errors
+        if errors:
+            print(f"Erro ao carregar {len(errors)} arquivo(s), por exemplo:")
+            for file_path, error in errors[:5]:
+                print(f"  {file_path}: {error}")
+    
+    def build_cache(self, style):
+        """
+        Pré-processa os mapas de um estilo para o cache em disco.
+        
+        Apenas os arquivos novos ou alterados desde a última execução são
+        decodificados novamente.
+        
+        Args:
+            style (str): Estilo do mapa
+            
+        Returns:
+            numpy.ndarray: Mapas (N, altura, largura) em memory-mapping somente leitura
+        """
+        height, width = self.map_size
+        return self.cache.update(f"{style}_{height}x{width}", self.list_map_files(style), self.load_maps)
+    
+    def load_dataset(self, style, split_ratio=0.8, use_cache=False):
+        """Carrega o dataset para um estilo específico.
+        
+        Com `use_cache=True`, os mapas são lidos do cache pré-processado
+        (ver `build_cache`) em vez de decodificar todas as imagens.
+        """
+        style_dir = os.path.join(self.data_dir, self.styles[style]['path'])
+        
+        if use_cache:
+            maps = self.build_cache(style)
+            if len(maps) == 0:
+                raise ValueError(f"Nenhum mapa encontrado em {style_dir}")
+            print(f"Total de mapas carregados do cache: {len(maps)}")
+            return train_test_split(maps, train_size=split_ratio, random_state=42)
         
         print(f"Carregando mapas de {style_dir}...")
         
-        for file in os.listdir(style_dir):
-            if file.endswith(('.png', '.jpg')):
-                try:
-                    map_data = self.load_map(os.path.join(style_dir, file))
-                    maps.append(map_data)
-                    print(f"Mapa carregado: {file}")
-                except Exception as e:
-                    print(f"Erro ao carregar {file}: {e}")
+        maps, errors = self.load_maps(self.list_map_files(style))
+        self._report_errors(errors)
+        maps = [map_data for map_data in maps if map_data is not None]
         
         if not maps:
             raise ValueError(f"Nenhum mapa encontrado em {style_dir}")
@@ -44,11 +123,143 @@ class DatasetManager:
         print(f"Total de mapas carregados: {len(maps)}")
         return train_test_split(maps, train_size=split_ratio, random_state=42)
     
-    def preprocess_map(self, map_data):
-        """Pré-processa um mapa para treinamento."""
+    def load_sharded_dataset(self, shard_dir, style, split_ratio=0.8):
+        """
+        Carrega os mapas de um estilo a partir de um diretório de shards.
+        
+        Args:
+            shard_dir (str): Diretório escrito por `ShardWriter`
+            style (str): Estilo do mapa
+            split_ratio (float): Fração dos mapas destinada ao treino
+            
+        Returns:
+            list: (train, test) como em `load_dataset`
+        """
+        reader = ShardReader(shard_dir)
+        indices = reader.find(style=style)
+        if len(indices) == 0:
+            raise ValueError(f"Nenhum mapa {style} encontrado em {shard_dir}")
+        
+        maps = reader.get_batch(indices)
+        print(f"Total de mapas carregados dos shards: {len(maps)}")
+        return train_test_split(maps, train_size=split_ratio, random_state=42)
+    
+    def stream_maps(self, style, subset='train', split_ratio=0.8, source='disk',
+                    num_samples=None, chunk_size=256):
+        """
+        Gera os mapas de um estilo um a um, sem carregar o dataset inteiro.
+        
+        Args:
+            style (str): Estilo do mapa
+            subset (str): 'train', 'val' ou None para todos os mapas (apenas 'disk')
+            split_ratio (float): Fração dos arquivos destinada ao treino
+            source (str): 'disk' lê as imagens do estilo; 'synthetic' gera mapas
+                sintéticos sob demanda
+            num_samples (int, optional): Número de mapas sintéticos (infinito se None)
+            chunk_size (int): Número de mapas sintéticos gerados por vez
+            
+        Yields:
+            numpy.ndarray: Mapas (altura, largura) em float32
+            
+        Raises:
+            ValueError: Se `subset` ou `source` forem desconhecidos
+        """
+        if subset not in (None, 'train', 'val'):
+            raise ValueError(f"Subconjunto desconhecido: {subset} (válidos: 'train', 'val' ou None)")
+        if source == 'disk':
+            # A divisão usa apenas o nome do arquivo, então é estável entre execuções
+            for file_path in self.list_map_files(style):
+                if subset is not None and hash_split(os.path.basename(file_path), split_ratio) != subset:
+                    continue
+                map_data, error = self._try_load_map(file_path)
+                if error is not None:
+                    self.load_errors.append((file_path, error))
+                    continue
+                yield map_data.astype(np.float32)
+        elif source == 'synthetic':
+            # Mapas sintéticos são independentes, então não há divisão treino/validação
+            remaining = num_samples
+            while remaining is None or remaining > 0:
+                count = chunk_size if remaining is None else min(chunk_size, remaining)
+                yield from self.generate_synthetic_data(style, num_samples=count).astype(np.float32)
+                if remaining is not None:
+                    remaining -= count
+        else:
+            raise ValueError(f"Fonte de dados desconhecida: {source}")
+    
+    def stream_batches(self, style, batch_size=32, subset='train', split_ratio=0.8,
+                       source='disk', shuffle_buffer_size=1024, prefetch_size=2,
+                       seed=None, num_samples=None, drop_remainder=False):
+        """
+        Pipeline de entrada em streaming para o treinamento da GAN.
+        
+        Lê (ou sintetiza) os mapas sob demanda, embaralha com um buffer de
+        tamanho limitado, agrupa em lotes e pré-carrega os próximos lotes em
+        uma thread de fundo.
+        
+        Args:
+            style (str): Estilo do mapa
+            batch_size (int): Tamanho do lote
+            subset (str): 'train', 'val' ou None para todos os mapas
+            split_ratio (float): Fração dos arquivos destinada ao treino
+            source (str): 'disk' ou 'synthetic'
+            shuffle_buffer_size (int): Tamanho do buffer de embaralhamento (0 desativa)
+            prefetch_size (int): Número de lotes pré-carregados (0 desativa)
+            seed (int, optional): Semente do embaralhamento
+            num_samples (int, optional): Número de mapas sintéticos (infinito se None)
+            drop_remainder (bool): Se True, descarta o último lote incompleto
+            
+        Yields:
+            numpy.ndarray: Lotes de mapas (batch_size, altura, largura, 1)
+        """
+        maps = self.stream_maps(style, subset=subset, split_ratio=split_ratio,
+                                source=source, num_samples=num_samples)
+        if shuffle_buffer_size:
+            maps = shuffle_buffer(maps, shuffle_buffer_size, seed=seed)
+        batches = (maps_batch[..., np.newaxis]
+                   for maps_batch in batch(maps, batch_size, drop_remainder=drop_remainder))
+        if prefetch_size:
+            batches = prefetch(batches, prefetch_size)
+        return batches
+    
+    def as_tf_dataset(self, style, batch_size=32, subset='train', split_ratio=0.8,
+                      source='disk', shuffle_buffer_size=1024, seed=None,
+                      num_samples=None, drop_remainder=False):
+        """
+        Cria um `tf.data.Dataset` em streaming para o treinamento da GAN.
+        
+        Args:
+            style (str): Estilo do mapa
+            batch_size (int): Tamanho do lote
+            subset (str): 'train', 'val' ou None para todos os mapas
+            split_ratio (float): Fração dos arquivos destinada ao treino
+            source (str): 'disk' ou 'synthetic'
+            shuffle_buffer_size (int): Tamanho do buffer de embaralhamento (0 desativa)
+            seed (int, optional): Semente do embaralhamento
+            num_samples (int, optional): Número de mapas sintéticos (infinito se None)
+            drop_remainder (bool): Se True, descarta o último lote incompleto
+            
+        Returns:
+            tf.data.Dataset: Lotes de mapas (batch_size, altura, largura, 1)
+        """
+        import tensorflow as tf
+        
+        dataset = tf.data.Dataset.from_generator(
+            lambda: (map_data[..., np.newaxis] for map_data in self.stream_maps(
+                style, subset=subset, split_ratio=split_ratio,
+                source=source, num_samples=num_samples)),
+            output_signature=tf.TensorSpec(shape=self.map_size + (1,), dtype=tf.float32)
+        )
+        if shuffle_buffer_size:
+            dataset = dataset.shuffle(shuffle_buffer_size, seed=seed)
+        return dataset.batch(batch_size, drop_remainder=drop_remainder).prefetch(tf.data.AUTOTUNE)
+    
+    def preprocess_map(self, map_data, size=None):
+        """Pré-processa um mapa para treinamento, no tamanho `size` (altura, largura)."""
+        size = tuple(size or self.map_size)
         # Garante que o mapa tem o tamanho correto
-        if map_data.shape != (32, 32):
-            map_data = np.array(Image.fromarray(map_data).resize((32, 32), Image.Resampling.LANCZOS))
+        if map_data.shape != size:
+            map_data = np.array(Image.fromarray(map_data).resize(size[::-1], Image.Resampling.LANCZOS))
         
         # Normaliza os valores
         map_data = (map_data - np.min(map_data)) / (np.max(map_data) - np.min(map_data))
@@ -62,64 +273,93 @@ class DatasetManager:
             
         return map_data
     
-    def generate_synthetic_data(self, style, num_samples=1000):
-        """Gera dados sintéticos para treinamento inicial."""
-        maps = []
+    def generate_synthetic_data(self, style, num_samples=1000, seed=None):
+        """Gera dados sintéticos para treinamento inicial (ver `generate_synthetic_batch`)."""
+        return self.generate_synthetic_batch(style, num_samples=num_samples, seed=seed, dtype=np.float64)
+    
+    def generate_synthetic_batch(self, style, num_samples=1000, shape=None, seed=None,
+                                 dtype=np.float32, chunk_size=8192):
+        """
+        Gera um lote de mapas sintéticos de forma vetorizada.
+        
+        O ruído de todo o lote é sorteado de uma vez e os estilos são aplicados
+        ao longo do eixo do lote, em blocos de `chunk_size` mapas para limitar
+        a memória temporária.
+        
+        Args:
+            style (str): Estilo do mapa
+            num_samples (int): Número de mapas
+            shape (tuple, optional): Tamanho de cada mapa (altura, largura); padrão: map_size
+            seed (int, optional): Semente do gerador aleatório; se None, a semente
+                é sorteada do estado global do NumPy, de modo que `np.random.seed`
+                continua tornando os dados reproduzíveis
+            dtype (numpy.dtype): Tipo dos valores (float32 ou float64)
+            chunk_size (int): Número de mapas processados por bloco
+            
+        Returns:
+            numpy.ndarray: Mapas sintéticos (num_samples, altura, largura)
+        """
+        if seed is None:
+            seed = np.random.randint(2 ** 31)
+        rng = np.random.default_rng(seed)
         difficulty_range = self.styles[style]['difficulty_range']
+        maps = np.empty((num_samples,) + tuple(shape or self.map_size), dtype=dtype)
         
-        for _ in range(num_samples):
-            # Gera um mapa base com ruído
-            base_map = np.random.normal(0.5, 0.2, (32, 32))
+        for start in range(0, num_samples, chunk_size):
+            chunk = maps[start:start + chunk_size]
+            
+            # Gera os mapas base com ruído
+            noise = chunk if style != 'open_world' else np.empty_like(chunk)
+            rng.standard_normal(dtype=noise.dtype, out=noise)
+            noise *= 0.2
+            noise += 0.5
             
-            # Ajusta a dificuldade baseado no estilo
-            difficulty = np.random.uniform(*difficulty_range)
-            base_map = base_map * difficulty
+            # Ajusta a dificuldade de cada mapa baseado no estilo
+            difficulty = rng.uniform(*difficulty_range, size=len(chunk)).astype(dtype)
+            noise *= difficulty[:, np.newaxis, np.newaxis]
             
             # Aplica pós-processamento específico do estilo
             if style == 'dungeon':
-                base_map = self._apply_dungeon_style(base_map)
+                self._apply_dungeon_style(chunk)
             elif style == 'cyberpunk':
-                base_map = self._apply_cyberpunk_style(base_map)
+                self._apply_cyberpunk_style(chunk)
             elif style == 'open_world':
-                base_map = self._apply_open_world_style(base_map)
+                gaussian_filter(noise, sigma=1, axes=(-2, -1), output=chunk)
             elif style == 'medieval':
-                base_map = self._apply_medieval_style(base_map)
+                self._apply_medieval_style(chunk)
             elif style == 'sci_fi':
-                base_map = self._apply_sci_fi_style(base_map)
+                self._apply_sci_fi_style(chunk)
                 
-            maps.append(base_map)
-            
-        return np.array(maps)
+        return maps
     
     def _apply_dungeon_style(self, map_data):
-        """Aplica características de estilo dungeon."""
+        """Aplica características de estilo dungeon (mapa ou lote, no próprio array)."""
         # Adiciona corredores e salas
-        map_data = np.where(map_data > 0.7, 1.0, map_data)
-        map_data = np.where(map_data < 0.3, 0.0, map_data)
+        map_data[map_data > 0.7] = 1.0
+        map_data[map_data < 0.3] = 0.0
         return map_data
     
     def _apply_cyberpunk_style(self, map_data):
-        """Aplica características de estilo cyberpunk."""
-        # Adiciona padrões geométricos e estruturas futuristas
-        for i in range(0, 32, 4):
-            map_data[i:i+2, :] = np.maximum(map_data[i:i+2, :], 0.8)
+        """Aplica características de estilo cyberpunk (mapa ou lote, no próprio array)."""
+        # Adiciona faixas horizontais de 2 linhas a cada 4
+        rows = np.arange(map_data.shape[-2]) % 4 < 2
+        map_data[..., rows, :] = np.maximum(map_data[..., rows, :], 0.8)
         return map_data
     
     def _apply_open_world_style(self, map_data):
-        """Aplica características de estilo mundo aberto."""
+        """Aplica características de estilo mundo aberto (mapa ou lote)."""
         # Suaviza o terreno e adiciona variações naturais
-        from scipy.ndimage import gaussian_filter
-        return gaussian_filter(map_data, sigma=1)
+        return gaussian_filter(map_data, sigma=1, axes=(-2, -1))
     
     def _apply_medieval_style(self, map_data):
-        """Aplica características de estilo medieval."""
+        """Aplica características de estilo medieval (mapa ou lote, no próprio array)."""
         # Adiciona estruturas de castelo e vilas
-        map_data = np.where(map_data > 0.6, 1.0, map_data)
+        map_data[map_data > 0.6] = 1.0
         return map_data
     
     def _apply_sci_fi_style(self, map_data):
-        """Aplica características de estilo sci-fi."""
-        # Adiciona estruturas tecnológicas e padrões futuristas
-        for i in range(0, 32, 4):
-            map_data[:, i:i+2] = np.maximum(map_data[:, i:i+2], 0.8)
-        return map_data 
\ No newline at end of file
+        """Aplica características de estilo sci-fi (mapa ou lote, no próprio array)."""
+        # Adiciona faixas verticais de 2 colunas a cada 4
+        columns = np.arange(map_data.shape[-1]) % 4 < 2
+        map_data[..., columns] = np.maximum(map_data[..., columns], 0.8)
+        return map_data
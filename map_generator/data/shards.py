@@ -0,0 +1,284 @@
+import os
+import json
+import numpy as np
+
+class ShardWriter:
+    """
+    Escreve mapas em um diretório de shards de tamanho fixo (somente acréscimo).
+
+    Layout do diretório:
+        meta.json           Shape, dtype, tamanho dos shards e número de mapas por shard
+        shard_00000.npy     Mapas empilhados (shard_size, H, W[, C]), pré-alocados
+        index.jsonl         Uma linha por mapa com style, difficulty, seed e description
+
+    Mapas em ponto flutuante no intervalo [0, 1] podem ser quantizados para
+    uint8 (`quantize=True`) ou armazenados como float16.
+    """
+
+    META_VERSION = 1
+
+    def __init__(self, directory, shape=None, dtype=None, shard_size=None, quantize=None):
+        """
+        Abre (ou cria) um diretório de shards para escrita.
+
+        Ao reabrir um diretório existente, os parâmetros omitidos vêm do
+        meta.json; os informados precisam coincidir com ele.
+
+        Args:
+            directory (str): Diretório dos shards
+            shape (tuple, optional): Shape de cada mapa; se None, usa o do primeiro mapa
+            dtype (str, optional): Tipo armazenado ('uint8', 'float16', ...); padrão 'uint8'
+            shard_size (int, optional): Número máximo de mapas por shard; padrão 4096
+            quantize (bool, optional): Se True (padrão) e dtype for uint8, mapas
+                em [0, 1] são multiplicados por 255 ao salvar e divididos ao carregar
+
+        Raises:
+            ValueError: Se os parâmetros informados diferirem dos do diretório existente
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._meta_path = os.path.join(directory, 'meta.json')
+        self._index_path = os.path.join(directory, 'index.jsonl')
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            stored_dtype = np.dtype(self.meta['dtype'])
+            if shape is not None and self.meta['shape'] is None:
+                self.meta['shape'] = list(shape)
+            if shape is not None and tuple(shape) != tuple(self.meta['shape']):
+                raise ValueError(f"Shape {tuple(shape)} diferente do existente {tuple(self.meta['shape'])}")
+            if dtype is not None and np.dtype(dtype) != stored_dtype:
+                raise ValueError(f"Dtype {np.dtype(dtype)} diferente do existente {stored_dtype}")
+            if shard_size is not None and shard_size != self.meta['shard_size']:
+                raise ValueError(f"Tamanho de shard {shard_size} diferente do existente {self.meta['shard_size']}")
+            if quantize is not None and (255 if quantize and stored_dtype == np.uint8 else None) != self.meta['scale']:
+                raise ValueError(f"quantize={quantize} diferente do existente (escala {self.meta['scale']})")
+            self._truncate_index(sum(shard['count'] for shard in self.meta['shards']))
+        else:
+            dtype = np.dtype(dtype if dtype is not None else 'uint8')
+            quantize = True if quantize is None else quantize
+            self.meta = {
+                'version': self.META_VERSION,
+                'shape': list(shape) if shape is not None else None,
+                'dtype': dtype.str,
+                'scale': 255 if quantize and dtype == np.uint8 else None,
+                'shard_size': shard_size if shard_size is not None else 4096,
+                'shards': []
+            }
+            # Entradas de um conjunto anterior sem meta.json não têm mapas
+            self._truncate_index(0)
+
+        self._index_file = open(self._index_path, 'a', encoding='utf-8')
+        self._shard = None
+
+    def _truncate_index(self, count):
+        """Descarta entradas do índice sem mapa correspondente (escrita interrompida)."""
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) != count:
+            with open(self._index_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[:count])
+
+    def _open_shard(self):
+        """Abre o último shard, ou cria um novo se ele estiver cheio."""
+        shards = self.meta['shards']
+        if shards and shards[-1]['count'] < self.meta['shard_size']:
+            path = os.path.join(self.directory, shards[-1]['file'])
+            self._shard = np.load(path, mmap_mode='r+')
+            return
+
+        name = f"shard_{len(shards):05d}.npy"
+        self._shard = np.lib.format.open_memmap(
+            os.path.join(self.directory, name), mode='w+', dtype=np.dtype(self.meta['dtype']),
+            shape=(self.meta['shard_size'],) + tuple(self.meta['shape'])
+        )
+        shards.append({'file': name, 'count': 0})
+
+    def _encode(self, map_data):
+        """Converte um mapa para o tipo armazenado."""
+        map_data = np.asarray(map_data)
+        if self.meta['scale'] is not None and map_data.dtype != np.uint8:
+            map_data = np.rint(np.clip(map_data, 0, 1) * self.meta['scale'])
+        return map_data
+
+    def append(self, map_data, style=None, difficulty=None, seed=None, description=None):
+        """
+        Acrescenta um mapa ao final do conjunto.
+
+        Args:
+            map_data (numpy.ndarray): Mapa a ser salvo
+            style (str, optional): Estilo do mapa
+            difficulty (str or float, optional): Dificuldade do mapa
+            seed (int, optional): Semente usada na geração
+            description (str, optional): Descrição textual do mapa
+
+        Returns:
+            int: Índice global do mapa
+        """
+        if self.meta['shape'] is None:
+            self.meta['shape'] = list(np.shape(map_data))
+        if tuple(np.shape(map_data)) != tuple(self.meta['shape']):
+            raise ValueError(f"Shape {np.shape(map_data)} diferente do esperado {tuple(self.meta['shape'])}")
+
+        if self._shard is None:
+            self._open_shard()
+        shard = self.meta['shards'][-1]
+        self._shard[shard['count']] = self._encode(map_data)
+        shard['count'] += 1
+
+        entry = {'style': style, 'difficulty': difficulty, 'seed': seed, 'description': description}
+        self._index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        # Shard cheio: grava em disco e passa para o próximo
+        if shard['count'] == self.meta['shard_size']:
+            self.flush()
+            self._shard = None
+
+        return len(self) - 1
+
+    def __len__(self):
+        return sum(shard['count'] for shard in self.meta['shards'])
+
+    def flush(self):
+        """Grava os dados pendentes e atualiza o meta.json de forma atômica."""
+        if self._shard is not None:
+            self._shard.flush()
+        self._index_file.flush()
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def close(self):
+        """Grava os dados pendentes e fecha o conjunto."""
+        self.flush()
+        self._shard = None
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+class ShardReader:
+    """
+    Leitura com acesso aleatório de um diretório escrito por `ShardWriter`.
+
+    Os shards são abertos sob demanda com memory-mapping.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        self.shard_size = self.meta['shard_size']
+        self.scale = self.meta['scale']
+        self._shards = {}
+        self._length = sum(shard['count'] for shard in self.meta['shards'])
+
+        # Carrega o índice como colunas
+        self.styles = []
+        self.difficulties = []
+        self.seeds = []
+        self.descriptions = []
+        index_path = os.path.join(directory, 'index.jsonl')
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line, _ in zip(f, range(self._length)):
+                    entry = json.loads(line)
+                    self.styles.append(entry['style'])
+                    self.difficulties.append(entry['difficulty'])
+                    self.seeds.append(entry['seed'])
+                    self.descriptions.append(entry['description'])
+        self.styles = np.array(self.styles, dtype=object)
+        self.difficulties = np.array(self.difficulties, dtype=object)
+
+    def __len__(self):
+        return self._length
+
+    def _shard(self, shard_index):
+        """Retorna o shard em memory-mapping, abrindo-o se necessário."""
+        if shard_index not in self._shards:
+            path = os.path.join(self.directory, self.meta['shards'][shard_index]['file'])
+            self._shards[shard_index] = np.load(path, mmap_mode='r')
+        return self._shards[shard_index]
+
+    def _decode(self, maps):
+        """Converte mapas armazenados de volta para o tipo original."""
+        if self.scale is not None:
+            return maps.astype(np.float32) / self.scale
+        return np.array(maps)
+
+    def __getitem__(self, index):
+        """Retorna o mapa de índice global `index`."""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"Índice fora do intervalo: {index}")
+        shard_index, offset = divmod(index, self.shard_size)
+        return self._decode(self._shard(shard_index)[offset])
+
+    def get_batch(self, indices):
+        """
+        Retorna vários mapas de uma vez, agrupando as leituras por shard.
+
+        Args:
+            indices (array-like): Índices globais dos mapas
+
+        Returns:
+            numpy.ndarray: Mapas empilhados, na ordem de `indices`
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= self._length):
+            raise IndexError("Índice fora do intervalo")
+        shard_indices, offsets = np.divmod(indices, self.shard_size)
+        maps = np.empty((len(indices),) + tuple(self.meta['shape']), dtype=np.dtype(self.meta['dtype']))
+        for shard_index in np.unique(shard_indices):
+            mask = shard_indices == shard_index
+            maps[mask] = self._shard(int(shard_index))[offsets[mask]]
+        return self._decode(maps)
+
+    def metadata(self, index):
+        """Retorna os metadados (style, difficulty, seed, description) de um mapa."""
+        return {
+            'style': self.styles[index],
+            'difficulty': self.difficulties[index],
+            'seed': self.seeds[index],
+            'description': self.descriptions[index]
+        }
+
+    def find(self, style=None, difficulty=None):
+        """
+        Retorna os índices dos mapas com o estilo e/ou a dificuldade informados.
+
+        Returns:
+            numpy.ndarray: Índices globais em ordem crescente
+        """
+        mask = np.ones(self._length, dtype=bool)
+        if style is not None:
+            mask &= self.styles == style
+        if difficulty is not None:
+            mask &= self.difficulties == difficulty
+        return np.flatnonzero(mask)
+
+    def iter_batches(self, batch_size=256, indices=None):
+        """
+        Percorre os mapas em lotes.
+
+        Args:
+            batch_size (int): Tamanho do lote
+            indices (array-like, optional): Índices a percorrer (todos se None)
+
+        Yields:
+            numpy.ndarray: Lotes de mapas
+        """
+        if indices is None:
+            indices = np.arange(self._length)
+        for start in range(0, len(indices), batch_size):
+            yield self.get_batch(indices[start:start + batch_size])
@@ -0,0 +1,118 @@
+import hashlib
+import queue
+import threading
+import numpy as np
+
+def hash_split(key, split_ratio=0.8, salt=""):
+    """
+    Define, de forma determinística, se uma amostra é de treino ou de validação.
+
+    A decisão depende apenas do hash da chave, então não é preciso carregar
+    o dataset inteiro e a divisão não muda quando arquivos são adicionados.
+
+    Args:
+        key (str): Identificador estável da amostra (por exemplo, o nome do arquivo)
+        split_ratio (float): Fração das amostras destinada ao treino
+        salt (str): Sal opcional para gerar divisões diferentes
+
+    Returns:
+        str: 'train' ou 'val'
+    """
+    digest = hashlib.md5(f"{salt}{key}".encode('utf-8')).digest()
+    fraction = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    return 'train' if fraction < split_ratio else 'val'
+
+def shuffle_buffer(iterable, buffer_size, seed=None):
+    """
+    Embaralha um fluxo usando um buffer de tamanho limitado.
+
+    Args:
+        iterable (iterable): Fluxo de amostras
+        buffer_size (int): Número máximo de amostras mantidas em memória
+        seed (int, optional): Semente do gerador aleatório
+
+    Yields:
+        Amostras do fluxo em ordem embaralhada
+    """
+    rng = np.random.default_rng(seed)
+    buffer = []
+    for item in iterable:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        index = rng.integers(buffer_size)
+        yield buffer[index]
+        buffer[index] = item
+
+    rng.shuffle(buffer)
+    yield from buffer
+
+def batch(iterable, batch_size, drop_remainder=False):
+    """
+    Agrupa um fluxo de arrays em lotes.
+
+    Args:
+        iterable (iterable): Fluxo de arrays com o mesmo shape
+        batch_size (int): Tamanho do lote
+        drop_remainder (bool): Se True, descarta o último lote incompleto
+
+    Yields:
+        numpy.ndarray: Lotes com shape (batch_size, ...)
+    """
+    items = []
+    for item in iterable:
+        items.append(item)
+        if len(items) == batch_size:
+            yield np.stack(items)
+            items = []
+    if items and not drop_remainder:
+        yield np.stack(items)
+
+def prefetch(iterable, buffer_size=2):
+    """
+    Consome um fluxo em uma thread de fundo, mantendo alguns itens prontos.
+
+    Exceções levantadas pelo fluxo são repassadas ao consumidor.
+
+    Args:
+        iterable (iterable): Fluxo a ser pré-carregado
+        buffer_size (int): Número de itens mantidos prontos
+
+    Yields:
+        Itens do fluxo, na mesma ordem
+    """
+    items = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        # Espera por espaço na fila, desistindo se o consumidor parou
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -1,15 +1,33 @@
 import numpy as np
-import tensorflow as tf
-from .models.gan import GANModel
-from .models.rl import RLModel
 from .utils.map_elements import MapElements
 from .utils.map_descriptor import MapDescriptor
-import matplotlib.pyplot as plt
+from .utils.map_io import quantize, to_class_grid, save_bundle, load_bundle
+from .utils.map_exporter import MapExporter
+from .tflite_backend import TFLiteGenerator, export_gan_to_tflite
+from .compiled_inference import CompiledForward
+from .utils.tiling import tiled_generate
+from .utils.wfc import refine_layout
+from .utils.map_utils import validate_map, validate_map_batch, calculate_difficulty, calculate_difficulty_batch
+from .utils.map_hash import perceptual_hash, hamming_distance
 from PIL import Image
 import os
+import time
+import warnings
 
 class MapGenerator:
-    def __init__(self, style="dungeon", difficulty="medium", size=(32, 32)):
+    # Tamanho (largura, altura) em que a GAN e o RL foram treinados
+    TILE_SIZE = (32, 32)
+    
+    # Valor de `calculate_difficulty` esperado para cada nível de dificuldade
+    TARGET_DIFFICULTIES = {
+        'easy': 0.3,
+        'medium': 0.5,
+        'hard': 0.7,
+        'very_hard': 0.9
+    }
+    
+    def __init__(self, style="dungeon", difficulty="medium", size=(32, 32), jit_compile=False,
+                 backend="tf", tflite_model_path="models/gan_generator.tflite", tile_overlap=8):
         """
         Inicializa o gerador de mapas.
         
@@ -17,17 +35,43 @@ class MapGenerator:
             style (str): Estilo do mapa ('dungeon', 'open_world', 'cyberpunk')
             difficulty (str): Nível de dificuldade ('easy', 'medium', 'hard')
             size (tuple): Tamanho do mapa (largura, altura)
+            jit_compile (bool): Se True, os passos de inferência da GAN e do RL
+                (`tf.function` com assinatura fixa por tamanho) são compilados com XLA
+            backend (str): Backend do gerador da GAN: 'tf' (GANModel) ou 'tflite'
+                (modelo quantizado exportado por `export_tflite`, executado pelo
+                `tflite_runtime` quando instalado). O GANModel só é importado
+                com 'tf'; o RLModel não tem exportação para TFLite (o
+                `balance_map` roda em Keras), então o TensorFlow completo ainda
+                é carregado para o balanceamento em ambos os backends
+            tflite_model_path (str): Arquivo .tflite usado pelo backend 'tflite'
+            tile_overlap (int): Sobreposição, em células, entre os tiles usados
+                para gerar mapas maiores que TILE_SIZE
         """
         self.style = style
         self.difficulty = difficulty
         self.size = size
+        self.tile_overlap = tile_overlap
+        
+        self.jit_compile = jit_compile
         
         # Inicializa os modelos
-        self.gan_model = GANModel()
+        # Os modelos importam o TensorFlow, por isso só são importados aqui
+        if backend == "tf":
+            from .models.gan import GANModel
+            self.gan_model = GANModel()
+        elif backend == "tflite":
+            self.gan_model = TFLiteGenerator(tflite_model_path)
+        else:
+            raise ValueError(f"Backend desconhecido: {backend}")
+        self.backend = backend
+        from .models.rl import RLModel
         self.rl_model = RLModel()
         self.map_elements = MapElements()
         self.map_descriptor = MapDescriptor()
         
+        # Taxa de aceitação observada em `generate_batch`, por (estilo, dificuldade)
+        self.acceptance_rates = {}
+        
         # Carrega os pesos dos modelos treinados
         try:
             self.gan_model.load_weights("models/gan_final.weights.h5")
@@ -37,7 +81,16 @@ class MapGenerator:
             print(f"Erro ao carregar os modelos: {e}")
             print("Usando modelos não treinados...")
         
-    def generate_map(self, style=None, difficulty=None, size=None, visual=True):
+        # Inferência com grafos traçados por tamanho: a rede geradora da GAN
+        # fica em `generator` e a do RL em `model`, usadas via `predict`
+        self.compiled_gan = None
+        if backend == "tf":
+            self.compiled_gan = CompiledForward.install(getattr(self.gan_model, 'generator', None), jit_compile)
+        self.compiled_rl = CompiledForward.install(getattr(self.rl_model, 'model', None), jit_compile)
+        
+    def generate_map(self, style=None, difficulty=None, size=None, visual=True, use_wfc=False,
+                     timeout=None, require_valid=False, max_attempts=10, return_status=False,
+                     verbose=True):
         """
         Gera um novo mapa baseado nos parâmetros definidos.
         
@@ -46,36 +99,296 @@ class MapGenerator:
             difficulty (str, optional): Nível de dificuldade ('easy', 'medium', 'hard', 'very_hard')
             size (tuple, optional): Tamanho do mapa (largura, altura)
             visual (bool, optional): Se True, retorna o mapa visual em RGB
+            use_wfc (bool, optional): Se True, usa o mapa da GAN/RL como layout
+                grosseiro e refina o detalhe local com o WFC
+            timeout (float, optional): Tempo máximo, em segundos, respeitado pelo
+                WFC e pelas novas tentativas; ao esgotar, retorna o melhor mapa
+                gerado, mesmo que incompleto
+            require_valid (bool, optional): Se True, gera novos mapas até que um
+                passe em `validate_map` com o WFC completo; se nenhum passar,
+                retorna o melhor candidato (válido, completo e mais próximo da
+                dificuldade alvo, nessa ordem)
+            max_attempts (int, optional): Número máximo de mapas gerados com
+                `require_valid`
+            return_status (bool, optional): Se True, retorna também se o mapa
+                atende às restrições (WFC completo e, com `require_valid`, válido)
+            verbose (bool, optional): Se False, não imprime o progresso nem a descrição
             
         Returns:
-            tuple: (map_data, description) onde map_data é o mapa gerado e description é a descrição textual
+            tuple: (map_data, description) onde map_data é o mapa gerado e description
+                é a descrição textual, ou (map_data, description, met) com `return_status`
         """
         # Usa os parâmetros fornecidos ou os valores padrão
         style = style if style is not None else self.style
         difficulty = difficulty if difficulty is not None else self.difficulty
         size = size if size is not None else self.size
+        deadline = None if timeout is None else time.perf_counter() + timeout
         
-        print(f"Gerando mapa {style}...")
-        
-        # Gera o mapa base usando GAN
-        base_map = self.gan_model.generate(style, size)
-        print("Mapa gerado com sucesso usando GAN para", style)
-        print(f"Min: {base_map.min():.4f}, Max: {base_map.max():.4f}")
-        print(f"Mean: {base_map.mean():.4f}, Std: {base_map.std():.4f}")
-        
-        # Ajusta a dificuldade usando RL
-        balanced_map = self.rl_model.balance_map(base_map, difficulty)
+        target = self.TARGET_DIFFICULTIES[difficulty]
+        best_map, best_score = None, None
+        for attempt in range(max_attempts if require_valid else 1):
+            candidate, complete = self._generate_candidate(style, difficulty, size, use_wfc, deadline, verbose)
+            valid = validate_map(candidate[..., 0]) if require_valid else True
+            met = bool(complete and valid)
+            # Atende às restrições, depois válido, completo e mais perto da dificuldade alvo
+            error = abs(calculate_difficulty(candidate[..., 0]) - target)
+            score = (met, valid, complete, -error)
+            if best_score is None or score > best_score:
+                best_map, best_score = candidate, score
+            if met:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                if verbose:
+                    print("Prazo esgotado; usando o melhor mapa gerado")
+                break
+            if verbose and require_valid and attempt + 1 < max_attempts:
+                print(f"Mapa não atende às restrições, gerando outro (tentativa {attempt + 2}/{max_attempts})...")
+        balanced_map, met = best_map, best_score[0]
         
         # Gera a descrição textual do mapa
         description = self.map_descriptor.generate_description(balanced_map[..., 0], style, difficulty)
-        print("\nDescrição do mapa:")
-        print(description)
+        if verbose:
+            print("\nDescrição do mapa:")
+            print(description)
         
         if visual:
             # Converte o mapa para visual usando MapElements
-            return self.map_elements.create_map_from_difficulty(balanced_map[..., 0], style), description
+            map_data = self.map_elements.create_map_from_difficulty(balanced_map[..., 0], style)
+        else:
+            map_data = balanced_map
+        return (map_data, description, met) if return_status else (map_data, description)
+    
+    def _generate_candidate(self, style, difficulty, size, use_wfc, deadline=None, verbose=True):
+        """
+        Gera um mapa de dificuldade com GAN, RL e, opcionalmente, WFC.
+        
+        Args:
+            style (str): Estilo do mapa
+            difficulty (str): Nível de dificuldade
+            size (tuple): Tamanho do mapa (largura, altura)
+            use_wfc (bool): Se True, refina o mapa com o WFC
+            deadline (float, optional): Prazo, no relógio de `time.perf_counter`
+            verbose (bool): Se False, não imprime o progresso nem as estatísticas
+            
+        Returns:
+            tuple: (mapa (altura, largura, 1), completo), onde completo é False
+                se o WFC foi interrompido pelo prazo
+        """
+        if verbose:
+            print(f"Gerando mapa {style}...")
+        
+        # Gera o mapa base usando GAN
+        base_map = self._generate_base_map(style, size)
+        if verbose:
+            print("Mapa gerado com sucesso usando GAN para", style)
+            print(f"Min: {base_map.min():.4f}, Max: {base_map.max():.4f}")
+            print(f"Mean: {base_map.mean():.4f}, Std: {base_map.std():.4f}")
+        
+        # Ajusta a dificuldade usando RL
+        balanced_map = self._balance_map(base_map, difficulty)
+        
+        complete = True
+        if use_wfc:
+            # O mapa da GAN/RL define os pesos a priori de cada célula no WFC
+            timeout = None if deadline is None else max(deadline - time.perf_counter(), 0.0)
+            tiles = self.map_elements.convert_to_tiles(balanced_map[..., 0])
+            refined, complete = refine_layout(balanced_map[..., 0], tiles, timeout=timeout,
+                                              return_status=True, verbose=verbose)
+            balanced_map = refined[..., np.newaxis]
+        return balanced_map, complete
+    
+    def generate_batch(self, num_maps, style=None, difficulty=None, size=None, tolerance=0.1,
+                       use_wfc=False, max_rounds=5, max_batch=256, return_status=False,
+                       dedup_index=None, dedup_distance=3, verbose=True):
+        """
+        Gera mapas jogáveis e próximos da dificuldade alvo por amostragem com rejeição.
+        
+        A cada rodada é gerado um lote com sobra de candidatos, avaliados de
+        uma só vez com `validate_map_batch` e `calculate_difficulty_batch`;
+        com `use_wfc`, candidatos em que o WFC não terminou são rejeitados,
+        como em `generate_map`. A sobra é ajustada pela taxa de aceitação
+        observada para cada (estilo, dificuldade), em média móvel exponencial.
+        
+        Só a avaliação é feita em lote: GANModel e RLModel geram e balanceiam
+        um mapa por chamada, então os candidatos ainda são produzidos um a um.
+        Se as rodadas acabarem antes de `num_maps` mapas serem aceitos, o lote
+        é completado com os melhores candidatos rejeitados e um
+        `RuntimeWarning` é emitido.
+        
+        Args:
+            num_maps (int): Número de mapas
+            style (str, optional): Estilo dos mapas
+            difficulty (str, optional): Nível de dificuldade (ver TARGET_DIFFICULTIES)
+            size (tuple, optional): Tamanho dos mapas (largura, altura)
+            tolerance (float): Diferença máxima entre a dificuldade calculada e a alvo
+            use_wfc (bool): Se True, refina os candidatos com o WFC
+            max_rounds (int): Número máximo de lotes gerados
+            max_batch (int): Número máximo de candidatos por lote
+            return_status (bool): Se True, retorna também quais mapas foram aceitos
+            dedup_index (HashIndex, optional): Índice de hashes perceptuais; candidatos
+                quase iguais a um mapa do índice ou a outro aceito são rejeitados, e
+                os mapas aceitos retornados são inseridos no índice
+            dedup_distance (int): Distância de Hamming máxima entre duplicatas
+            verbose (bool): Se False, não imprime o resumo de cada lote; os
+                candidatos são sempre gerados sem imprimir o progresso
+            
+        Returns:
+            numpy.ndarray | tuple: Mapas (N, altura, largura, 1), os aceitos
+                primeiro e ordenados pela proximidade da dificuldade alvo, ou
+                (mapas, aceitos) com `return_status`
+        """
+        style = style if style is not None else self.style
+        difficulty = difficulty if difficulty is not None else self.difficulty
+        size = size if size is not None else self.size
+        target = self.TARGET_DIFFICULTIES[difficulty]
+        key = (style, difficulty)
+        
+        candidates, errors, accepted, accepted_codes = [], [], [], []
+        for _ in range(max_rounds):
+            missing = num_maps - sum(accepted)
+            if missing <= 0:
+                break
+            
+            # Sobra de candidatos inversamente proporcional à taxa de aceitação
+            rate = max(self.acceptance_rates.get(key, 0.5), 1.0 / max_batch)
+            batch_size = min(int(np.ceil(missing / rate)), max_batch)
+            
+            results = [self._generate_candidate(style, difficulty, size, use_wfc, verbose=False)
+                       for _ in range(batch_size)]
+            batch = np.stack([candidate for candidate, _ in results])
+            batch_complete = np.array([complete for _, complete in results], dtype=bool)
+            
+            batch_errors = np.abs(calculate_difficulty_batch(batch) - target)
+            batch_accepted = batch_complete & validate_map_batch(batch) & (batch_errors <= tolerance)
+            if dedup_index is not None:
+                batch_codes = perceptual_hash(batch)
+                for i in np.flatnonzero(batch_accepted):
+                    near_accepted = accepted_codes and (hamming_distance(
+                        np.array(accepted_codes), batch_codes[i]) <= dedup_distance).any()
+                    if near_accepted or dedup_index.contains_near(batch_codes[i], dedup_distance):
+                        batch_accepted[i] = False
+                    else:
+                        accepted_codes.append(batch_codes[i])
+            candidates.extend(batch)
+            errors.extend(batch_errors)
+            accepted.extend(batch_accepted)
+            
+            observed = batch_accepted.mean()
+            self.acceptance_rates[key] = float(0.7 * self.acceptance_rates.get(key, observed) + 0.3 * observed)
+            if verbose:
+                print(f"Lote de {batch_size} candidatos: {batch_accepted.sum()} aceitos "
+                      f"(taxa estimada {self.acceptance_rates[key]:.2f})")
+        
+        # Aceitos primeiro, depois os mais próximos da dificuldade alvo
+        order = np.lexsort((np.array(errors), ~np.array(accepted, dtype=bool)))[:num_maps]
+        if len(order):
+            maps = np.stack([candidates[i] for i in order])
         else:
-            return balanced_map, description
+            maps = np.zeros((0, size[1], size[0], 1), dtype=np.float32)
+        met = np.array(accepted, dtype=bool)[order]
+        if not met.all():
+            warnings.warn(f"Apenas {met.sum()} de {num_maps} mapas atendem às restrições após "
+                          f"{max_rounds} rodadas; os demais são candidatos rejeitados", RuntimeWarning)
+        if dedup_index is not None:
+            dedup_index.add_maps(maps[met])
+        return (maps, met) if return_status else maps
+    
+    def _fits_tile(self, width, height):
+        """Indica se um mapa cabe em um único tile dos modelos."""
+        return width <= self.TILE_SIZE[0] and height <= self.TILE_SIZE[1]
+    
+    def _generate_base_map(self, style, size):
+        """
+        Gera o mapa base com a GAN.
+        
+        Mapas maiores que TILE_SIZE são gerados costurando tiles sobrepostos
+        com mistura linear, sem precisar retreinar a GAN.
+        
+        Args:
+            style (str): Estilo do mapa
+            size (tuple): Tamanho do mapa (largura, altura)
+            
+        Returns:
+            numpy.ndarray: Mapa base (altura, largura, 1)
+        """
+        width, height = size
+        if self._fits_tile(width, height):
+            return self.gan_model.generate(style, size)
+        return tiled_generate(lambda: self.gan_model.generate(style, self.TILE_SIZE),
+                              shape=(height, width), tile_shape=self.TILE_SIZE[::-1],
+                              overlap=self.tile_overlap)
+    
+    def _balance_map(self, base_map, difficulty):
+        """
+        Ajusta a dificuldade do mapa com o RL, em tiles quando maior que TILE_SIZE.
+        
+        Args:
+            base_map (numpy.ndarray): Mapa base (altura, largura, 1)
+            difficulty (str): Nível de dificuldade
+            
+        Returns:
+            numpy.ndarray: Mapa balanceado (altura, largura, 1)
+        """
+        height, width = base_map.shape[:2]
+        if self._fits_tile(width, height):
+            return self.rl_model.balance_map(base_map, difficulty)
+        return tiled_generate(lambda patch: self.rl_model.balance_map(patch, difficulty),
+                              shape=(height, width), tile_shape=self.TILE_SIZE[::-1],
+                              overlap=self.tile_overlap, source=base_map)
+    
+    def warmup(self, sizes=None, styles=None, difficulties=None):
+        """
+        Pré-executa a inferência da GAN e do RL para as combinações informadas.
+        
+        Traça (e, com `jit_compile`, compila com XLA) os grafos de inferência
+        da GAN e do RL para o shape usado em cada tamanho e depois executa o
+        pipeline uma vez; chamar este método na inicialização do serviço tira
+        esse custo da primeira requisição.
+        
+        Args:
+            sizes (list, optional): Tamanhos a aquecer (padrão: self.size)
+            styles (list, optional): Estilos a aquecer (padrão: self.style)
+            difficulties (list, optional): Dificuldades a aquecer (padrão: self.difficulty)
+            
+        Returns:
+            dict: Tempo em segundos de cada combinação (style, size)
+        """
+        sizes = sizes or [self.size]
+        styles = styles or [self.style]
+        difficulties = difficulties or [self.difficulty]
+        
+        timings = {}
+        for size in sizes:
+            # Mapas maiores que um tile são gerados tile a tile
+            width, height = size if self._fits_tile(*size) else self.TILE_SIZE
+            for compiled in (self.compiled_gan, self.compiled_rl):
+                input_shapes = compiled.input_shapes(height, width) if compiled is not None else None
+                if input_shapes is not None:
+                    compiled.warmup(input_shapes)
+            for style in styles:
+                start = time.perf_counter()
+                base_map = self._generate_base_map(style, tuple(size))
+                for difficulty in difficulties:
+                    self._balance_map(base_map, difficulty)
+                timings[(style, tuple(size))] = time.perf_counter() - start
+        
+        print(f"Aquecimento concluído: {len(timings)} combinações em {sum(timings.values()):.2f}s")
+        return timings
+    
+    def export_tflite(self, output_path="models/gan_generator.tflite", quantization="float16"):
+        """
+        Exporta o gerador da GAN treinada para TFLite, para uso com backend='tflite'.
+        
+        Args:
+            output_path (str): Arquivo de saída (.tflite)
+            quantization (str, optional): 'float16', 'int8' ou None
+            
+        Returns:
+            str: Caminho do arquivo gerado
+        """
+        if self.backend != "tf":
+            raise ValueError("A exportação requer o backend 'tf'")
+        return export_gan_to_tflite(self.gan_model, output_path, quantization=quantization)
     
     def visualize_map(self, map_data):
         """
@@ -84,6 +397,9 @@ class MapGenerator:
         Args:
             map_data (numpy.ndarray): Dados do mapa a serem visualizados
         """
+        # O matplotlib só é necessário aqui (ver `contact_sheet` para renderização sem ele)
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(10, 10))
         if len(map_data.shape) == 3:  # Mapa visual RGB
             plt.imshow(map_data)
@@ -93,34 +409,122 @@ class MapGenerator:
         plt.colorbar()
         plt.show()
     
-    def save_map(self, map_data, filename):
+    def save_map(self, map_data, filename, codec=None):
         """
         Salva o mapa em um arquivo.
         
+        O formato é escolhido pela extensão:
+            .png/.jpg  Mapa visual RGB; mapas de dificuldade são salvos em
+                       tons de cinza, quantizados para uint8
+            .npz       Pacote comprimido (ver `save_map_bundle`)
+            outras     Array `.npy`; com codec 'uint8' ou 'classes' o mapa de
+                       dificuldade é salvo quantizado, ainda sem compressão,
+                       e pode ser carregado com memory-mapping
+        
         Args:
             map_data (numpy.ndarray): Dados do mapa
             filename (str): Nome do arquivo de saída
+            codec (str, optional): Codec do mapa de dificuldade (ver `map_io.encode_map`)
         """
         # Cria o diretório se não existir
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         
-        if len(map_data.shape) == 3:  # Mapa visual RGB
+        is_visual = map_data.ndim == 3 and map_data.shape[-1] in (3, 4)
+        
+        if filename.endswith('.npz'):
+            if is_visual:
+                self.save_map_bundle(filename, visual_map=map_data)
+            else:
+                self.save_map_bundle(filename, difficulty_map=map_data, codec=codec or 'uint8')
+        elif filename.endswith(('.png', '.jpg')):
+            if not is_visual:
+                # Mapa de dificuldade (H, W) ou (H, W, 1) em [0, 1]: tons de cinza
+                map_data = quantize(map_data[..., 0] if map_data.ndim == 3 else map_data)
             img = Image.fromarray(map_data)
             img.save(filename)
-        else:  # Mapa de dificuldade
+        elif codec is None:  # Mapa de dificuldade
             np.save(filename, map_data)
+        elif codec == 'uint8':
+            np.save(filename, quantize(map_data))
+        elif codec == 'classes':
+            np.save(filename, to_class_grid(map_data))
+        else:
+            raise ValueError(f"Codec {codec} requer um arquivo .npz")
+    
+    def export_maps(self, maps, output_dir, num_workers=4, scale=1, manifest_name="manifest.jsonl"):
+        """
+        Exporta vários mapas em PNG usando um pool de escrita em segundo plano.
+        
+        As descrições são gravadas em um único manifesto JSONL no diretório de saída.
+        
+        Args:
+            maps (iterable): Tuplas (nome, map_data, description) ou
+                (nome, map_data, description, metadata), onde metadata é um dict
+            output_dir (str): Diretório de saída
+            num_workers (int): Número de threads de escrita
+            scale (int): Fator de ampliação (vizinho mais próximo) das imagens
+            manifest_name (str): Nome do manifesto JSONL
+            
+        Returns:
+            dict: Estatísticas da exportação (ver `MapExporter.stats`)
+        """
+        with MapExporter(output_dir, manifest_name=manifest_name,
+                         num_workers=num_workers, scale=scale) as exporter:
+            for name, map_data, description, *metadata in maps:
+                exporter.submit(name, map_data, description, **(metadata[0] if metadata else {}))
+        
+        stats = exporter.stats()
+        print(f"{stats['maps']} mapas exportados em {stats['seconds']:.2f}s "
+              f"({stats['maps_per_second']:.1f} mapas/s, {stats['errors']} erros)")
+        return stats
+    
+    def save_map_bundle(self, filename, difficulty_map=None, visual_map=None, description=None, codec='uint8'):
+        """
+        Salva o mapa de dificuldade, o mapa visual e a descrição em um único `.npz`.
+        
+        Args:
+            filename (str): Nome do arquivo de saída (.npz)
+            difficulty_map (numpy.ndarray, optional): Mapa de dificuldade
+            visual_map (numpy.ndarray, optional): Mapa visual RGB
+            description (str, optional): Descrição textual do mapa
+            codec (str): Codec do mapa de dificuldade ('float16', 'uint8', 'uint4',
+                'classes', 'classes4' ou 'rle')
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        save_bundle(filename, difficulty_map, visual_map, description, codec=codec)
+    
+    def load_map_bundle(self, filename):
+        """
+        Carrega um pacote salvo por `save_map_bundle`.
+        
+        Args:
+            filename (str): Nome do arquivo (.npz)
+            
+        Returns:
+            dict: Chaves 'difficulty', 'visual' e 'description' (None quando ausentes)
+        """
+        return load_bundle(filename)
     
-    def load_map(self, filename):
+    def load_map(self, filename, mmap_mode=None):
         """
         Carrega um mapa de um arquivo.
         
         Args:
             filename (str): Nome do arquivo a ser carregado
+            mmap_mode (str, optional): Modo de memory-mapping para arquivos `.npy`
+                (mapas quantizados são retornados como uint8; ver `map_io.dequantize`)
             
         Returns:
             numpy.ndarray: Dados do mapa carregado
         """
         if filename.endswith(('.png', '.jpg')):
             return np.array(Image.open(filename))
+        elif filename.endswith('.npz'):
+            bundle = self.load_map_bundle(filename)
+            return bundle['difficulty'] if bundle['difficulty'] is not None else bundle['visual']
         else:
-            return np.load(filename) 
\ No newline at end of file
+            return np.load(filename, mmap_mode=mmap_mode)
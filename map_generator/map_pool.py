@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+
+class MapPool:
+    """
+    Pool de mapas pré-gerados por (estilo, dificuldade) em torno de um MapGenerator.
+
+    As requisições são atendidas direto da fila da combinação pedida. Quando
+    uma fila fica abaixo do nível mínimo, uma thread em segundo plano a
+    completa até a capacidade. O uso dos modelos é serializado por um lock,
+    compartilhado entre a reposição e as requisições que não encontram mapa
+    pronto.
+    """
+
+    def __init__(self, generator, capacity=16, low_water=4, keys=None, **generate_kwargs):
+        """
+        Args:
+            generator (MapGenerator): Gerador usado para produzir os mapas
+            capacity (int): Número máximo de mapas prontos por combinação
+            low_water (int): Nível abaixo do qual a combinação é reposta
+            keys (list, optional): Combinações (estilo, dificuldade) a encher na criação
+            **generate_kwargs: Argumentos extras de `MapGenerator.generate_map`
+                (por exemplo, visual=False ou use_wfc=True)
+        """
+        if not 0 <= low_water <= capacity:
+            raise ValueError(f"Nível mínimo inválido: {low_water} (capacidade {capacity})")
+        self.generator = generator
+        self.capacity = capacity
+        self.low_water = low_water
+        self.generate_kwargs = generate_kwargs
+
+        self._pools = {}
+        self._pending = deque()
+        self._scheduled_at = {}
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        # Janelas das últimas medições, em segundos
+        self.refill_latencies = deque(maxlen=1000)
+        self.generation_times = deque(maxlen=1000)
+
+        self._worker = threading.Thread(target=self._refill_loop, name="MapPoolRefill", daemon=True)
+        self._worker.start()
+        for style, difficulty in keys or []:
+            self.warm(style, difficulty)
+
+    def _generate(self, style, difficulty):
+        """Gera um mapa com o modelo, um de cada vez."""
+        with self._model_lock:
+            start = time.perf_counter()
+            result = self.generator.generate_map(style=style, difficulty=difficulty, **self.generate_kwargs)
+            elapsed = time.perf_counter() - start
+        with self._lock:
+            self.generation_times.append(elapsed)
+        return result
+
+    def _schedule(self, key):
+        """Agenda a reposição de uma combinação (chamado com o lock adquirido)."""
+        if key not in self._pending:
+            self._pending.append(key)
+            self._scheduled_at[key] = time.perf_counter()
+            self._wakeup.notify()
+
+    def warm(self, style, difficulty):
+        """
+        Agenda o enchimento da fila de uma combinação, sem bloquear.
+
+        Args:
+            style (str): Estilo do mapa
+            difficulty (str): Nível de dificuldade
+        """
+        key = (style, difficulty)
+        with self._lock:
+            self._pools.setdefault(key, deque(maxlen=self.capacity))
+            self._schedule(key)
+
+    def get(self, style, difficulty):
+        """
+        Retorna um mapa pronto da combinação, ou gera um na hora se a fila estiver vazia.
+
+        Args:
+            style (str): Estilo do mapa
+            difficulty (str): Nível de dificuldade
+
+        Returns:
+            tuple: Resultado de `MapGenerator.generate_map` (mapa, descrição)
+        """
+        key = (style, difficulty)
+        with self._lock:
+            pool = self._pools.setdefault(key, deque(maxlen=self.capacity))
+            result = pool.popleft() if pool else None
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if len(pool) < self.low_water:
+                self._schedule(key)
+
+        if result is None:
+            result = self._generate(style, difficulty)
+        return result
+
+    def _refill_loop(self):
+        """Thread de reposição: completa as filas agendadas até a capacidade."""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                key = self._pending[0]
+
+            # Gera um mapa por vez, liberando o modelo para as requisições entre eles
+            while True:
+                with self._lock:
+                    if self._closed:
+                        return
+                    if len(self._pools[key]) >= self.capacity:
+                        self._pending.popleft()
+                        self.refills += 1
+                        self.refill_latencies.append(time.perf_counter() - self._scheduled_at.pop(key))
+                        break
+                try:
+                    result = self._generate(*key)
+                except Exception as e:
+                    print(f"Erro ao repor o pool {key}: {e}")
+                    with self._lock:
+                        self._pending.popleft()
+                        self._scheduled_at.pop(key, None)
+                    break
+                with self._lock:
+                    self._pools[key].append(result)
+
+    def stats(self):
+        """
+        Retorna as métricas do pool.
+
+        Returns:
+            dict: Acertos, faltas, taxa de acerto, reposições, latência das
+                reposições (do agendamento até a fila cheia) e da geração de
+                cada mapa, em segundos, e o tamanho atual de cada fila
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            refill_latencies = list(self.refill_latencies)
+            generation_times = list(self.generation_times)
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'refills': self.refills,
+                'refill_latency_mean': sum(refill_latencies) / len(refill_latencies) if refill_latencies else 0.0,
+                'refill_latency_max': max(refill_latencies, default=0.0),
+                'generation_time_mean': sum(generation_times) / len(generation_times) if generation_times else 0.0,
+                'sizes': {key: len(pool) for key, pool in self._pools.items()}
+            }
+
+    def close(self):
+        """Para a thread de reposição, aguardando o mapa em geração."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
@@ -0,0 +1,134 @@
+import numpy as np
+
+STYLES = ['dungeon', 'open_world', 'cyberpunk', 'medieval', 'sci_fi']
+
+def _load_interpreter_class():
+    """Retorna a classe Interpreter do tflite_runtime, ou a do TensorFlow se ausente."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+def _sample_inputs(input_shapes, rng):
+    """Gera entradas aleatórias: ruído latente e, se houver, o estilo em one-hot."""
+    inputs = [rng.normal(size=(1,) + tuple(input_shapes[0][1:])).astype(np.float32)]
+    for shape in input_shapes[1:]:
+        one_hot = np.zeros((1,) + tuple(shape[1:]), dtype=np.float32)
+        one_hot[..., rng.integers(shape[-1])] = 1.0
+        inputs.append(one_hot)
+    return inputs
+
+def export_gan_to_tflite(gan_model, output_path, quantization='float16', num_calibration_samples=100):
+    """
+    Exporta a rede geradora de um GANModel treinado para TFLite.
+
+    Args:
+        gan_model (GANModel): Modelo com os pesos carregados; a rede geradora
+            (Keras) deve estar no atributo `generator`
+        output_path (str): Arquivo de saída (.tflite)
+        quantization (str, optional): 'float16', 'int8' (pesos e ativações,
+            calibrados com ruído latente) ou None para float32
+        num_calibration_samples (int): Número de amostras usadas na calibração int8
+
+    Returns:
+        str: Caminho do arquivo gerado
+    """
+    import os
+    import tensorflow as tf
+
+    generator = getattr(gan_model, 'generator', None)
+    if generator is None:
+        raise ValueError("O modelo GAN não expõe a rede geradora (atributo 'generator')")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(generator)
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        input_shapes = [tuple(tensor.shape) for tensor in generator.inputs]
+        rng = np.random.default_rng(0)
+
+        def representative_dataset():
+            for _ in range(num_calibration_samples):
+                yield _sample_inputs(input_shapes, rng)
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+    elif quantization is not None:
+        raise ValueError(f"Quantização desconhecida: {quantization}")
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"Gerador exportado para {output_path} (quantização: {quantization})")
+    return output_path
+
+
+class TFLiteGenerator:
+    """
+    Backend de inferência leve para o gerador da GAN usando o interpretador TFLite.
+
+    Expõe o mesmo `generate(style, size)` do GANModel. Usa o pacote
+    `tflite_runtime` quando instalado, evitando carregar o TensorFlow completo.
+    """
+
+    def __init__(self, model_path, num_threads=None, output_range=(0.0, 1.0), seed=None):
+        """
+        Args:
+            model_path (str): Arquivo .tflite gerado por `export_gan_to_tflite`
+            num_threads (int, optional): Número de threads do interpretador
+            output_range (tuple): Intervalo da saída do gerador (por exemplo,
+                (-1, 1) para tanh), convertido para [0, 1]
+            seed (int, optional): Semente do ruído latente
+        """
+        Interpreter = _load_interpreter_class()
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self.output_range = output_range
+        self.rng = np.random.default_rng(seed)
+
+    def load_weights(self, path):
+        """Os pesos já estão embutidos no arquivo .tflite."""
+
+    def generate(self, style, size=(32, 32)):
+        """
+        Gera um mapa base.
+
+        Args:
+            style (str): Estilo do mapa (usado quando o modelo tem entrada de estilo)
+            size (tuple): Tamanho do mapa; deve ser o tamanho nativo do modelo
+
+        Returns:
+            numpy.ndarray: Mapa (altura, largura, 1) com valores entre 0 e 1
+        """
+        latent = self.input_details[0]
+        self.interpreter.set_tensor(latent['index'], self.rng.normal(
+            size=(1,) + tuple(latent['shape'][1:])).astype(latent['dtype']))
+
+        # Modelos condicionais recebem o estilo em one-hot na segunda entrada
+        if len(self.input_details) > 1:
+            condition = self.input_details[1]
+            one_hot = np.zeros((1,) + tuple(condition['shape'][1:]), dtype=condition['dtype'])
+            one_hot[..., STYLES.index(style)] = 1
+            self.interpreter.set_tensor(condition['index'], one_hot)
+
+        self.interpreter.invoke()
+
+        output = self.output_details[0]
+        map_data = self.interpreter.get_tensor(output['index'])[0]
+        if output['dtype'] != np.float32:
+            scale, zero_point = output['quantization']
+            map_data = (map_data.astype(np.float32) - zero_point) * scale
+        if map_data.ndim == 2:
+            map_data = map_data[..., np.newaxis]
+        if map_data.shape[:2] != tuple(size)[::-1]:
+            raise ValueError(f"O modelo TFLite gera mapas {map_data.shape[:2]}, tamanho pedido: {size}")
+
+        low, high = self.output_range
+        return np.clip((map_data - low) / (high - low), 0, 1)
@@ -0,0 +1,175 @@
+import numpy as np
+from typing import Dict
+from .wfc import RuleSet, DIRECTIONS
+
+class BatchWaveFunctionCollapse:
+    """
+    WFC em lote: resolve vários mapas independentes em lockstep.
+
+    A onda de todos os mapas fica em um único array de máscaras de bits
+    (N, H, W). A cada passo, cada mapa colapsa sua célula de menor entropia e
+    a propagação é feita sobre o array inteiro (AND com as máscaras de
+    vizinhos permitidos, deslocadas em cada direção) até o ponto fixo, de
+    modo que o custo do interpretador é dividido entre os N mapas.
+    """
+
+    def __init__(self, width: int, height: int, tiles: Dict[str, Dict], priors: np.ndarray = None,
+                 seed: int = None):
+        """
+        Args:
+            width (int): Largura dos mapas
+            height (int): Altura dos mapas
+            tiles (Dict[str, Dict]): Dicionário de tiles disponíveis (ver
+                `MapElements.convert_to_tiles`)
+            priors (np.ndarray, optional): Pesos a priori (H, W, número de tiles),
+                comuns a todos os mapas do lote (ver `difficulty_priors`)
+            seed (int, optional): Semente do gerador aleatório
+
+        Raises:
+            ValueError: Se as regras e os priors forem insatisfatíveis
+        """
+        self.width = width
+        self.height = height
+        self.tiles = tiles
+        self.rules = RuleSet.compile(tiles)
+        num_tiles = len(self.rules.tile_names)
+
+        # Peso de cada tile em cada célula (H * W, número de tiles)
+        if priors is None:
+            cell_weights = np.broadcast_to(self.rules.weights, (height, width, num_tiles))
+        else:
+            if priors.shape != (height, width, num_tiles):
+                raise ValueError(f"Priors com shape {priors.shape}, esperado {(height, width, num_tiles)}")
+            cell_weights = priors * self.rules.weights
+        self.cell_weights = np.ascontiguousarray(cell_weights, dtype=np.float64).reshape(-1, num_tiles)
+
+        # Onda inicial com consistência de arco, comum a todos os mapas
+        if not self.rules.live_mask and width >= 3 and height >= 3:
+            raise ValueError("Configuração insatisfatível: nenhum tile pode ocupar o interior do mapa "
+                             f"(tiles sem vizinhos possíveis: {self.rules.dead_tiles})")
+        # Máscaras de até 16 tiles cabem em inteiros menores, usados nas tabelas
+        self.tables = self.rules.lookup_tables()
+        self.dtype = np.int64 if self.tables is None else (np.uint8 if num_tiles <= 8 else np.uint16)
+        if self.tables is not None:
+            # As máscaras das quatro direções são empacotadas em um único
+            # inteiro por entrada, para que uma só consulta sirva às quatro
+            neighbors, counts = self.tables
+            packed_dtype = np.uint32 if self.dtype == np.uint8 else np.uint64
+            packed = np.ascontiguousarray(neighbors.T.astype(self.dtype)).view(packed_dtype).ravel()
+            entropy = counts.astype(np.float32)
+            entropy[counts <= 1] = np.inf
+            self.tables = (packed, entropy)
+        wave = ((self.cell_weights > 0) << np.arange(num_tiles)).sum(axis=1).astype(self.dtype)
+        wave = wave.reshape(1, height, width)
+        if not self._propagate(wave).all():
+            raise ValueError("Configuração insatisfatível: contradição na onda inicial")
+        self.initial_wave = wave[0]
+
+        self.rng = np.random.default_rng(seed)
+
+    def _allowed(self, wave: np.ndarray) -> np.ndarray:
+        """Máscaras (..., 4) dos tiles permitidos em cada direção de cada célula."""
+        if self.tables is not None:
+            return self.tables[0].take(wave).view(self.dtype).reshape(wave.shape + (len(DIRECTIONS),))
+        allowed = np.zeros(wave.shape + (len(DIRECTIONS),), dtype=wave.dtype)
+        for d, masks in enumerate(self.rules.compatible):
+            for t, mask in enumerate(masks):
+                allowed[..., d] |= np.where(wave >> t & 1, mask, 0)
+        return allowed
+
+    def _entropy(self, wave: np.ndarray) -> np.ndarray:
+        """Número de tiles possíveis de cada célula, infinito nas já colapsadas."""
+        if self.tables is not None:
+            return self.tables[1][wave]
+        counts = np.zeros(wave.shape, dtype=np.float32)
+        for t in range(len(self.rules.tile_names)):
+            counts += wave >> t & 1
+        counts[counts <= 1] = np.inf
+        return counts
+
+    def _propagate(self, wave: np.ndarray) -> np.ndarray:
+        """
+        Propaga as restrições em todos os mapas até o ponto fixo.
+
+        Args:
+            wave (np.ndarray): Onda (N, H, W), modificada no lugar
+
+        Returns:
+            np.ndarray: Máscara (N,) dos mapas sem contradição
+        """
+        height, width = self.height, self.width
+        while True:
+            # Cada passo restringe todas as células pelos quatro vizinhos de uma vez
+            new = wave.copy()
+            allowed = self._allowed(wave)
+            for d, (_, dx, dy) in enumerate(DIRECTIONS):
+                # Recorte das células com vizinho na direção d e dos respectivos vizinhos
+                cells = (slice(None), slice(max(-dy, 0), height - max(dy, 0)), slice(max(-dx, 0), width - max(dx, 0)))
+                neighbors = (slice(None), slice(max(dy, 0), height + min(dy, 0)), slice(max(dx, 0), width + min(dx, 0)))
+                new[neighbors] &= allowed[cells + (d,)]
+            if np.array_equal(new, wave):
+                break
+            wave[...] = new
+        return (wave != 0).reshape(len(wave), -1).all(axis=1)
+
+    def generate(self, num_maps: int, max_restarts: int = 100) -> np.ndarray:
+        """
+        Gera um lote de mapas.
+
+        Mapas que encontram uma contradição são reiniciados individualmente,
+        sem interromper os demais.
+
+        Args:
+            num_maps (int): Número de mapas
+            max_restarts (int): Número máximo de reinícios de cada mapa
+
+        Returns:
+            np.ndarray: Mapas (N, H, W) com os valores dos tiles; os índices dos
+                tiles ficam em `self.solutions`
+
+        Raises:
+            RuntimeError: Se algum mapa exceder o limite de reinícios
+        """
+        num_tiles = len(self.rules.tile_names)
+        cells_per_map = self.height * self.width
+        wave = np.repeat(self.initial_wave[np.newaxis], num_maps, axis=0)
+        flat_wave = wave.reshape(num_maps, cells_per_map)
+        restarts = np.zeros(num_maps, dtype=np.intp)
+        rows = np.arange(num_maps)
+
+        # Ruído fixo por célula desempata as células de mesma entropia
+        noise = self.rng.random((num_maps, cells_per_map), dtype=np.float32) * 0.5
+
+        while True:
+            # Observação: a célula não colapsada de menor entropia de cada mapa
+            entropy = self._entropy(flat_wave)
+            entropy += noise
+            cells = entropy.argmin(axis=1)
+            active = np.isfinite(entropy[rows, cells])
+            if not active.any():
+                break
+            maps, cells = rows[active], cells[active]
+
+            # Sorteio ponderado de um tile por mapa, com um único valor uniforme
+            masks = flat_wave[maps, cells]
+            weights = (masks[:, np.newaxis] >> np.arange(num_tiles) & 1) * self.cell_weights[cells]
+            cumulative = np.cumsum(weights, axis=1)
+            draws = self.rng.random(len(maps)) * cumulative[:, -1]
+            chosen = np.minimum((cumulative <= draws[:, np.newaxis]).sum(axis=1), num_tiles - 1)
+            flat_wave[maps, cells] = np.left_shift(1, chosen).astype(self.dtype)
+
+            # Reinicia apenas os mapas com contradição
+            failed = np.flatnonzero(~self._propagate(wave))
+            if len(failed):
+                restarts[failed] += 1
+                if restarts.max() > max_restarts:
+                    raise RuntimeError(f"O WFC não encontrou solução após {max_restarts} reinícios")
+                print(f"Contradição encontrada em {len(failed)} mapa(s). Reiniciando esses mapas...")
+                wave[failed] = self.initial_wave
+                noise[failed] = self.rng.random((len(failed), cells_per_map), dtype=np.float32) * 0.5
+
+        # Converte as máscaras colapsadas em índices e valores dos tiles
+        self.solutions = np.zeros(wave.shape, dtype=np.intp)
+        for t in range(1, num_tiles):
+            self.solutions[wave == 1 << t] = t
+        return self.rules.values[self.solutions]
@@ -0,0 +1,119 @@
+import numpy as np
+from functools import lru_cache
+from PIL import Image
+
+# Cores de referência de cada paleta, interpoladas linearmente
+COLORMAP_ANCHORS = {
+    'greys': [(255, 255, 255), (0, 0, 0)],
+    'viridis': [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)],
+    'plasma': [(13, 8, 135), (126, 3, 168), (204, 71, 120), (248, 149, 64), (240, 249, 33)],
+    'terrain': [(51, 51, 153), (0, 153, 255), (0, 204, 102), (255, 255, 153), (128, 92, 84), (255, 255, 255)],
+    'rdbu': [(103, 0, 31), (214, 96, 77), (247, 247, 247), (67, 147, 195), (5, 48, 97)]
+}
+
+@lru_cache(maxsize=None)
+def colormap_lut(name, size=256):
+    """
+    Cria a tabela de cores (LUT) de uma paleta.
+
+    Args:
+        name (str): Nome da paleta (ver `COLORMAP_ANCHORS`)
+        size (int): Número de entradas da tabela
+
+    Returns:
+        numpy.ndarray: Tabela (size, 3) em uint8
+    """
+    if name not in COLORMAP_ANCHORS:
+        raise ValueError(f"Paleta desconhecida: {name}")
+    anchors = np.array(COLORMAP_ANCHORS[name], dtype=np.float64)
+    positions = np.linspace(0, 1, len(anchors))
+    samples = np.linspace(0, 1, size)
+    lut = np.stack([np.interp(samples, positions, anchors[:, c]) for c in range(3)], axis=-1)
+    lut = np.rint(lut).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+def apply_colormap(maps, cmap='viridis', vmin=0.0, vmax=1.0):
+    """
+    Converte mapas de dificuldade em imagens RGB usando uma paleta.
+
+    Args:
+        maps (numpy.ndarray): Mapa (H, W) ou lote de mapas (..., H, W)
+        cmap (str): Nome da paleta
+        vmin (float): Valor associado à primeira cor
+        vmax (float): Valor associado à última cor
+
+    Returns:
+        numpy.ndarray: Imagens (..., H, W, 3) em uint8
+    """
+    lut = colormap_lut(cmap)
+    scale = (len(lut) - 1) / max(vmax - vmin, 1e-12)
+    # Células NaN recebem a primeira cor (e infinitos, a cor do extremo)
+    indices = np.nan_to_num((np.asarray(maps, dtype=np.float32) - vmin) * scale, nan=0.0)
+    indices = np.clip(indices, 0, len(lut) - 1)
+    return lut[indices.astype(np.intp)]
+
+def render_contact_sheet(maps, columns=None, scale=1, padding=1, cmap='viridis',
+                         vmin=0.0, vmax=1.0, background=(0, 0, 0)):
+    """
+    Monta uma folha de contato com vários mapas em uma única imagem.
+
+    Args:
+        maps (numpy.ndarray): Mapas de dificuldade (N, H, W) ou (N, H, W, 1),
+            ou mapas visuais (N, H, W, 3) em uint8
+        columns (int, optional): Número de colunas (padrão: grade quase quadrada)
+        scale (int): Fator de ampliação (vizinho mais próximo) de cada mapa
+        padding (int): Espaço entre os mapas, em pixels
+        cmap (str): Paleta usada para os mapas de dificuldade
+        vmin (float): Valor associado à primeira cor da paleta
+        vmax (float): Valor associado à última cor da paleta
+        background (tuple): Cor RGB do fundo
+
+    Returns:
+        numpy.ndarray: Imagem da folha (altura, largura, 3) em uint8
+    """
+    maps = np.asarray(maps)
+    if maps.ndim == 4 and maps.shape[-1] == 1:
+        maps = maps[..., 0]
+    if maps.ndim == 3:
+        tiles = apply_colormap(maps, cmap, vmin, vmax)
+    elif maps.ndim == 4 and maps.shape[-1] == 3:
+        tiles = maps.astype(np.uint8, copy=False)
+    else:
+        raise ValueError(f"Esperado (N, H, W) ou (N, H, W, 3), recebido shape {maps.shape}")
+
+    count = len(tiles)
+    if count == 0:
+        raise ValueError("Nenhum mapa para a folha de contato")
+    columns = columns or int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / columns))
+
+    if scale != 1:
+        tiles = tiles.repeat(scale, axis=1).repeat(scale, axis=2)
+    height, width = tiles.shape[1:3]
+
+    # Cada célula da grade tem o mapa precedido pelo espaçamento superior/esquerdo
+    grid = np.empty((rows, height + padding, columns, width + padding, 3), dtype=np.uint8)
+    grid[...] = background
+    cells = np.empty((rows * columns, height, width, 3), dtype=np.uint8)
+    cells[...] = background
+    cells[:count] = tiles
+    grid[:, padding:, :, padding:] = cells.reshape(rows, columns, height, width, 3).transpose(0, 2, 1, 3, 4)
+
+    # Acrescenta o espaçamento inferior/direito
+    sheet = np.empty((rows * (height + padding) + padding, columns * (width + padding) + padding, 3), dtype=np.uint8)
+    sheet[...] = background
+    sheet[:rows * (height + padding), :columns * (width + padding)] = grid.reshape(
+        rows * (height + padding), columns * (width + padding), 3)
+    return sheet
+
+def save_contact_sheet(filename, maps, **kwargs):
+    """
+    Monta e salva uma folha de contato (ver `render_contact_sheet`).
+
+    Args:
+        filename (str): Arquivo de saída (.png)
+        maps (numpy.ndarray): Mapas a serem exibidos
+        **kwargs: Argumentos de `render_contact_sheet`
+    """
+    Image.fromarray(render_contact_sheet(maps, **kwargs)).save(filename)
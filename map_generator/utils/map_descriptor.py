@@ -133,6 +133,29 @@ class MapDescriptor:
             
         return element_stats
 
+    def analyze_map_batch(self, maps: np.ndarray, style: str) -> np.ndarray:
+        """
+        Frequência de cada elemento em uma pilha de mapas, como `analyze_map`.
+
+        Args:
+            maps (np.ndarray): Mapas (N, H, W) ou (N, H, W, 1)
+            style (str): Estilo dos mapas
+
+        Returns:
+            np.ndarray: Frequências (N, número de elementos), com as colunas na
+                ordem de `element_names(style)`
+        """
+        flat = np.asarray(maps).reshape(len(maps), -1)
+        element_ids = np.array(list(self.style_descriptions[style]['elements']))
+        frequencies = np.empty((len(flat), len(element_ids)), dtype=np.float32)
+        for column, element_id in enumerate(element_ids):
+            frequencies[:, column] = np.count_nonzero(flat == element_id, axis=1) / flat.shape[1]
+        return frequencies
+
+    def element_names(self, style: str) -> List[str]:
+        """Nomes dos elementos do estilo, na ordem usada por `analyze_map`."""
+        return list(self.style_descriptions[style]['elements'].values())
+
     def generate_description(self, map_data: np.ndarray, style: str, difficulty: str) -> str:
         """Gera uma descrição textual do mapa."""
         # Analisa o mapa
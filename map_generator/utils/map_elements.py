@@ -73,7 +73,7 @@ class MapElements:
         Converte um mapa de dificuldade em tiles.
         
         Args:
-            difficulty_map (numpy.ndarray): Mapa de dificuldade (32x32)
+            difficulty_map (numpy.ndarray): Mapa de dificuldade (HxW)
             
         Returns:
             Dict[str, Dict]: Dicionário de tiles com seus valores e pesos
@@ -144,15 +144,17 @@ class MapElements:
         
         return tiles_dict
     
-    def convert_to_difficulty(self, tile_map):
+    def convert_to_difficulty(self, tile_map, tile_size=None):
         """
         Converte um mapa de tiles em mapa de dificuldade.
         
         Args:
             tile_map (numpy.ndarray): Mapa de tiles (HxWx3)
+            tile_size (int, optional): Lado de cada tile em pixels (padrão: o
+                tamanho dos tiles carregados)
             
         Returns:
-            numpy.ndarray: Mapa de dificuldade (32x32)
+            numpy.ndarray: Mapa de dificuldade (H/tile_size x W/tile_size)
         """
         # Define os valores de dificuldade para cada tipo de tile
         difficulty_values = {
@@ -164,11 +166,13 @@ class MapElements:
         }
         
         # Cria o mapa de dificuldade
-        difficulty_map = np.zeros((32, 32))
-        tile_size = tile_map.shape[0] // 32
+        if tile_size is None:
+            tile_size = next(t for tiles in self.tiles.values() for t in tiles).shape[0]
+        rows, cols = tile_map.shape[0] // tile_size, tile_map.shape[1] // tile_size
+        difficulty_map = np.zeros((rows, cols))
         
-        for y in range(32):
-            for x in range(32):
+        for y in range(rows):
+            for x in range(cols):
                 # Extrai o tile
                 tile = tile_map[y*tile_size:(y+1)*tile_size,
                               x*tile_size:(x+1)*tile_size]
@@ -190,14 +194,14 @@ class MapElements:
         Cria um mapa visual a partir do mapa de dificuldade.
         
         Args:
-            difficulty_map (numpy.ndarray): Mapa de dificuldade (32x32)
+            difficulty_map (numpy.ndarray): Mapa de dificuldade (HxW)
             style (str): Estilo do mapa
             
         Returns:
-            numpy.ndarray: Mapa visual (32x32x3)
+            numpy.ndarray: Mapa visual (HxWx3)
         """
         # Cria um mapa vazio com 3 canais (RGB)
-        visual_map = np.zeros((32, 32, 3), dtype=np.uint8)
+        visual_map = np.zeros(difficulty_map.shape[:2] + (3,), dtype=np.uint8)
         
         # Define os limites para cada tipo de elemento baseado na dificuldade
         thresholds = {
@@ -222,6 +226,21 @@ class MapElements:
             
         return visual_map
     
+    def _paint_elements(self, visual_map, difficulty_map, thresholds, colors):
+        """
+        Pinta cada célula com a cor do elemento correspondente à sua dificuldade.
+        
+        Args:
+            visual_map (numpy.ndarray): Mapa visual (HxWx3), alterado no próprio array
+            difficulty_map (numpy.ndarray): Mapa de dificuldade (HxW)
+            thresholds (dict): Intervalo de dificuldade de cada elemento
+            colors (dict): Cor RGB de cada elemento
+        """
+        elements = ['floor', 'path', 'wall', 'water', 'enemy']
+        bounds = [thresholds[element][1] for element in elements[:-1]]
+        palette = np.array([colors[element] for element in elements], dtype=np.uint8)
+        visual_map[:] = palette[np.digitize(difficulty_map, bounds)]
+        
     def _apply_dungeon_style(self, visual_map, difficulty_map, thresholds):
         """Aplica o estilo dungeon ao mapa."""
         # Define cores para cada elemento
@@ -234,19 +253,7 @@ class MapElements:
         }
         
         # Aplica as cores baseado nos valores de dificuldade
-        for i in range(32):
-            for j in range(32):
-                value = difficulty_map[i, j]
-                if value < thresholds['floor'][1]:
-                    visual_map[i, j] = colors['floor']
-                elif value < thresholds['path'][1]:
-                    visual_map[i, j] = colors['path']
-                elif value < thresholds['wall'][1]:
-                    visual_map[i, j] = colors['wall']
-                elif value < thresholds['water'][1]:
-                    visual_map[i, j] = colors['water']
-                else:
-                    visual_map[i, j] = colors['enemy']
+        self._paint_elements(visual_map, difficulty_map, thresholds, colors)
                     
         # Adiciona elementos específicos de dungeon
         self._add_doors(visual_map)
@@ -265,19 +272,7 @@ class MapElements:
         }
         
         # Aplica as cores baseado nos valores de dificuldade
-        for i in range(32):
-            for j in range(32):
-                value = difficulty_map[i, j]
-                if value < thresholds['floor'][1]:
-                    visual_map[i, j] = colors['floor']
-                elif value < thresholds['path'][1]:
-                    visual_map[i, j] = colors['path']
-                elif value < thresholds['wall'][1]:
-                    visual_map[i, j] = colors['wall']
-                elif value < thresholds['water'][1]:
-                    visual_map[i, j] = colors['water']
-                else:
-                    visual_map[i, j] = colors['enemy']
+        self._paint_elements(visual_map, difficulty_map, thresholds, colors)
                     
         # Adiciona elementos específicos de mundo aberto
         self._add_trees(visual_map)
@@ -296,19 +291,7 @@ class MapElements:
         }
         
         # Aplica as cores baseado nos valores de dificuldade
-        for i in range(32):
-            for j in range(32):
-                value = difficulty_map[i, j]
-                if value < thresholds['floor'][1]:
-                    visual_map[i, j] = colors['floor']
-                elif value < thresholds['path'][1]:
-                    visual_map[i, j] = colors['path']
-                elif value < thresholds['wall'][1]:
-                    visual_map[i, j] = colors['wall']
-                elif value < thresholds['water'][1]:
-                    visual_map[i, j] = colors['water']
-                else:
-                    visual_map[i, j] = colors['enemy']
+        self._paint_elements(visual_map, difficulty_map, thresholds, colors)
                     
         # Adiciona elementos específicos de cyberpunk
         self._add_neon_lights(visual_map)
@@ -327,19 +310,7 @@ class MapElements:
         }
         
         # Aplica as cores baseado nos valores de dificuldade
-        for i in range(32):
-            for j in range(32):
-                value = difficulty_map[i, j]
-                if value < thresholds['floor'][1]:
-                    visual_map[i, j] = colors['floor']
-                elif value < thresholds['path'][1]:
-                    visual_map[i, j] = colors['path']
-                elif value < thresholds['wall'][1]:
-                    visual_map[i, j] = colors['wall']
-                elif value < thresholds['water'][1]:
-                    visual_map[i, j] = colors['water']
-                else:
-                    visual_map[i, j] = colors['enemy']
+        self._paint_elements(visual_map, difficulty_map, thresholds, colors)
                     
         # Adiciona elementos específicos de medieval
         self._add_castle_walls(visual_map)
@@ -358,19 +329,7 @@ class MapElements:
         }
         
         # Aplica as cores baseado nos valores de dificuldade
-        for i in range(32):
-            for j in range(32):
-                value = difficulty_map[i, j]
-                if value < thresholds['floor'][1]:
-                    visual_map[i, j] = colors['floor']
-                elif value < thresholds['path'][1]:
-                    visual_map[i, j] = colors['path']
-                elif value < thresholds['wall'][1]:
-                    visual_map[i, j] = colors['wall']
-                elif value < thresholds['water'][1]:
-                    visual_map[i, j] = colors['water']
-                else:
-                    visual_map[i, j] = colors['enemy']
+        self._paint_elements(visual_map, difficulty_map, thresholds, colors)
                     
         # Adiciona elementos específicos de sci-fi
         self._add_tech_panels(visual_map)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from .map_io import quantize
+
+class MapExporter:
+    """
+    Exporta mapas em lote para PNG usando um pool de escrita em segundo plano.
+
+    As imagens são codificadas diretamente com o PIL (sem matplotlib) e as
+    descrições e metadados vão para um único manifesto JSONL, em vez de um
+    arquivo `.txt` por mapa.
+    """
+
+    def __init__(self, output_dir, manifest_name="manifest.jsonl", num_workers=4,
+                 max_pending=64, scale=1, compress_level=6):
+        """
+        Args:
+            output_dir (str): Diretório de saída
+            manifest_name (str): Nome do manifesto JSONL dentro de output_dir
+            num_workers (int): Número de threads de escrita
+            max_pending (int): Número máximo de mapas na fila; `submit` bloqueia além disso
+            scale (int): Fator de ampliação (vizinho mais próximo) das imagens
+            compress_level (int): Nível de compressão do PNG (0-9)
+        """
+        self.output_dir = output_dir
+        self.scale = scale
+        self.compress_level = compress_level
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._manifest = open(os.path.join(output_dir, manifest_name), 'a', encoding='utf-8')
+        self._submitted = 0
+        self._start_time = time.perf_counter()
+        self._end_time = None
+
+        self.count = 0
+        self.bytes_written = 0
+        self.errors = []
+
+    def _to_image(self, map_data):
+        """Converte um mapa visual (RGB) ou de dificuldade em imagem PIL."""
+        map_data = np.asarray(map_data)
+        if map_data.ndim == 3 and map_data.shape[-1] == 1:
+            map_data = map_data[..., 0]
+        if map_data.dtype != np.uint8:
+            map_data = quantize(map_data)
+        img = Image.fromarray(map_data)
+        if self.scale != 1:
+            img = img.resize((img.width * self.scale, img.height * self.scale), Image.Resampling.NEAREST)
+        return img
+
+    def _write(self, index, name, map_data, description, metadata):
+        """Codifica e grava um mapa, registrando-o no manifesto."""
+        try:
+            file_name = f"{name}.png"
+            path = os.path.join(self.output_dir, file_name)
+            self._to_image(map_data).save(path, compress_level=self.compress_level)
+            size = os.path.getsize(path)
+
+            entry = {'index': index, 'file': file_name, 'description': description}
+            entry.update(metadata)
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with self._lock:
+                self._manifest.write(line)
+                self.count += 1
+                self.bytes_written += size
+        except Exception as e:
+            with self._lock:
+                self.errors.append((name, e))
+        finally:
+            self._pending.release()
+
+    def submit(self, name, map_data, description=None, **metadata):
+        """
+        Enfileira um mapa para exportação.
+
+        Args:
+            name (str): Nome do arquivo, sem extensão
+            map_data (numpy.ndarray): Mapa visual (H, W, 3) ou de dificuldade (H, W)
+            description (str, optional): Descrição textual do mapa
+            **metadata: Campos extras gravados no manifesto (por exemplo, style)
+
+        Returns:
+            concurrent.futures.Future: Conclusão da escrita
+        """
+        self._pending.acquire()
+        index = self._submitted
+        self._submitted += 1
+        # Copia o mapa, já que o chamador pode reutilizar o buffer
+        return self._executor.submit(self._write, index, name, np.array(map_data), description, metadata)
+
+    def stats(self):
+        """
+        Retorna as estatísticas de exportação.
+
+        Returns:
+            dict: Mapas gravados, bytes, erros, tempo decorrido e vazão
+        """
+        end_time = self._end_time if self._end_time is not None else time.perf_counter()
+        elapsed = max(end_time - self._start_time, 1e-9)
+        return {
+            'maps': self.count,
+            'bytes': self.bytes_written,
+            'errors': len(self.errors),
+            'seconds': elapsed,
+            'maps_per_second': self.count / elapsed,
+            'megabytes_per_second': self.bytes_written / elapsed / 1e6
+        }
+
+    def close(self):
+        """
+        Espera as escritas pendentes e fecha o manifesto.
+
+        Returns:
+            dict: Estatísticas finais (ver `stats`)
+        """
+        if self._end_time is None:
+            self._executor.shutdown(wait=True)
+            self._manifest.close()
+            self._end_time = time.perf_counter()
+        return self.stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
@@ -0,0 +1,230 @@
+import numpy as np
+
+HASH_BITS = 64
+BAND_BITS = 16
+NUM_BANDS = HASH_BITS // BAND_BITS
+
+# Número de bits 1 de cada byte, usado quando np.bitwise_count não existe
+_BYTE_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint8)
+
+def popcount(codes):
+    """
+    Conta os bits 1 de cada código de 64 bits.
+
+    Args:
+        codes (numpy.ndarray): Códigos uint64
+
+    Returns:
+        numpy.ndarray: Número de bits 1 de cada código
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(codes)
+    return _BYTE_POPCOUNT[codes.reshape(-1, 1).view(np.uint8)].sum(axis=1).reshape(codes.shape)
+
+def hamming_distance(a, b):
+    """
+    Distância de Hamming entre códigos de 64 bits (com broadcasting).
+
+    Args:
+        a (numpy.ndarray): Códigos uint64
+        b (numpy.ndarray): Códigos uint64
+
+    Returns:
+        numpy.ndarray: Número de bits diferentes
+    """
+    return popcount(np.bitwise_xor(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64)))
+
+def _block_means(maps, size):
+    """Reduz mapas (N, H, W) a (N, size, size) pela média de blocos."""
+    height, width = maps.shape[1:]
+    if height < size or width < size:
+        maps = maps.repeat(-(-size // height), axis=1).repeat(-(-size // width), axis=2)
+        height, width = maps.shape[1:]
+    rows = np.linspace(0, height, size + 1).astype(np.intp)
+    cols = np.linspace(0, width, size + 1).astype(np.intp)
+    sums = np.add.reduceat(np.add.reduceat(maps, rows[:-1], axis=1), cols[:-1], axis=2)
+    return sums / np.outer(np.diff(rows), np.diff(cols))
+
+def perceptual_hash(maps):
+    """
+    Calcula o hash perceptual de 64 bits de mapas de dificuldade.
+
+    Cada mapa é reduzido a 8x8 pela média de blocos e cada bit indica se o
+    bloco está acima da mediana do mapa; mapas quase iguais têm hashes a
+    poucos bits de distância.
+
+    Args:
+        maps (numpy.ndarray): Mapa (H, W) ou mapas (N, H, W), com ou sem o
+            eixo final de canal
+
+    Returns:
+        numpy.ndarray | numpy.uint64: Hash de cada mapa
+    """
+    maps = np.asarray(maps, dtype=np.float32)
+    if maps.shape[-1] == 1 and maps.ndim in (3, 4):
+        maps = maps[..., 0]
+    single = maps.ndim == 2
+    maps = maps.reshape((-1,) + maps.shape[-2:])
+
+    size = int(np.sqrt(HASH_BITS))
+    blocks = _block_means(maps, size).reshape(len(maps), -1)
+    bits = blocks > np.median(blocks, axis=1, keepdims=True)
+    codes = np.packbits(bits, axis=1).view('>u8')[:, 0].astype(np.uint64)
+    return codes[0] if single else codes
+
+
+class HashIndex:
+    """
+    Índice de hashes de 64 bits para busca de vizinhos por distância de Hamming.
+
+    Usa multi-index hashing: o código é dividido em 4 faixas de 16 bits e,
+    para cada faixa, os códigos ficam agrupados por valor em arrays no
+    formato CSR (deslocamentos + ordem). Pelo princípio da casa dos pombos,
+    códigos a até 3 bits de distância coincidem em pelo menos uma faixa, de
+    modo que a busca é exata até essa distância e aproximada acima dela.
+    Inserções recentes ficam em um buffer percorrido por força bruta até
+    serem incorporadas aos grupos.
+    """
+
+    def __init__(self, capacity=1024, pending_limit=32768):
+        """
+        Args:
+            capacity (int): Capacidade inicial, ampliada conforme necessário
+            pending_limit (int): Tamanho do buffer de inserções que dispara a
+                incorporação aos grupos
+        """
+        self.pending_limit = pending_limit
+        self._codes = np.zeros(capacity, dtype=np.uint64)
+        self._size = 0
+        self._indexed = 0
+        self._offsets = np.zeros((NUM_BANDS, (1 << BAND_BITS) + 1), dtype=np.int64)
+        self._order = np.zeros((NUM_BANDS, 0), dtype=np.uint32)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def codes(self):
+        """Códigos inseridos, na ordem de inserção (os ids são as posições)."""
+        return self._codes[:self._size]
+
+    def _bands(self, codes):
+        """Valores das faixas de 16 bits (NUM_BANDS, N)."""
+        shifts = np.arange(NUM_BANDS, dtype=np.uint64)[:, np.newaxis] * np.uint64(BAND_BITS)
+        return ((codes[np.newaxis, :] >> shifts) & np.uint64((1 << BAND_BITS) - 1)).astype(np.intp)
+
+    def _merge_pending(self):
+        """
+        Incorpora o buffer de inserções aos grupos de cada faixa.
+
+        Os códigos já agrupados são apenas deslocados, sem reordenação; só o
+        buffer é ordenado.
+        """
+        num_buckets = 1 << BAND_BITS
+        new_ids = np.arange(self._indexed, self._size)
+        bands = self._bands(self._codes[self._indexed:self._size])
+        order = np.empty((NUM_BANDS, self._size), dtype=np.uint32)
+        for b in range(NUM_BANDS):
+            old_counts = np.diff(self._offsets[b])
+            new_counts = np.bincount(bands[b], minlength=num_buckets)
+            offsets = np.zeros(num_buckets + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(old_counts + new_counts)
+
+            # Antigos: deslocados pelo número de novos nos grupos anteriores
+            old_buckets = np.repeat(np.arange(num_buckets), old_counts)
+            shift = offsets[:-1] - self._offsets[b, :-1]
+            order[b, np.arange(self._indexed) + shift[old_buckets]] = self._order[b]
+
+            # Novos: depois dos antigos do mesmo grupo, na ordem de inserção
+            sort = np.argsort(bands[b], kind='stable')
+            buckets = bands[b][sort]
+            rank = np.arange(len(sort)) - (np.cumsum(new_counts) - new_counts)[buckets]
+            order[b, offsets[buckets] + old_counts[buckets] + rank] = new_ids[sort]
+            self._offsets[b] = offsets
+        self._order = order
+        self._indexed = self._size
+
+    def add(self, codes):
+        """
+        Insere códigos no índice.
+
+        Args:
+            codes (numpy.ndarray): Código ou códigos uint64
+
+        Returns:
+            numpy.ndarray: Ids dos códigos inseridos
+        """
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.uint64))
+        end = self._size + len(codes)
+        if end > len(self._codes):
+            grown = np.zeros(max(end, 2 * len(self._codes)), dtype=np.uint64)
+            grown[:self._size] = self.codes
+            self._codes = grown
+        self._codes[self._size:end] = codes
+        ids = np.arange(self._size, end)
+        self._size = end
+
+        if self._size - self._indexed >= self.pending_limit:
+            self._merge_pending()
+        return ids
+
+    def query(self, code, max_distance=3):
+        """
+        Busca os códigos a até `max_distance` bits de distância.
+
+        Args:
+            code (int | numpy.uint64): Código consultado
+            max_distance (int): Distância de Hamming máxima (exata até 3)
+
+        Returns:
+            tuple: (ids, distâncias), ordenados pela distância
+        """
+        code = np.uint64(code)
+        bands = self._bands(np.array([code]))[:, 0]
+        candidates = [self._order[b, self._offsets[b, value]:self._offsets[b, value + 1]]
+                      for b, value in enumerate(bands)]
+        # Códigos do buffer são comparados todos, sem passar pelos grupos
+        ids = np.concatenate([np.unique(np.concatenate(candidates)).astype(np.intp),
+                              np.arange(self._indexed, self._size)])
+
+        distances = hamming_distance(self._codes[ids], code)
+        keep = distances <= max_distance
+        ids, distances = ids[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return ids[order], distances[order]
+
+    def contains_near(self, code, max_distance=3):
+        """Indica se há algum código a até `max_distance` bits de distância."""
+        return len(self.query(code, max_distance)[0]) > 0
+
+    def add_maps(self, maps):
+        """
+        Insere o hash perceptual de mapas.
+
+        Args:
+            maps (numpy.ndarray): Mapas (N, H, W) ou (N, H, W, 1)
+
+        Returns:
+            numpy.ndarray: Ids dos mapas inseridos
+        """
+        return self.add(perceptual_hash(maps))
+
+    def find_duplicates(self, maps, max_distance=3):
+        """
+        Marca os mapas quase iguais a algum mapa do índice ou a um mapa
+        anterior do mesmo lote.
+
+        Args:
+            maps (numpy.ndarray): Mapas (N, H, W) ou (N, H, W, 1)
+            max_distance (int): Distância de Hamming máxima entre duplicatas
+
+        Returns:
+            numpy.ndarray: Array booleano (N,) com os mapas duplicados
+        """
+        codes = perceptual_hash(maps)
+        duplicates = np.zeros(len(codes), dtype=bool)
+        for i, code in enumerate(codes):
+            near_previous = i > 0 and (hamming_distance(codes[:i][~duplicates[:i]], code) <= max_distance).any()
+            duplicates[i] = near_previous or self.contains_near(code, max_distance)
+        return duplicates
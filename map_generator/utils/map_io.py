@@ -0,0 +1,227 @@
+import numpy as np
+
+# Limites entre as classes de elementos (floor, path, wall, water, enemy),
+# os mesmos usados por MapElements
+CLASS_THRESHOLDS = np.array([0.3, 0.5, 0.7, 0.9])
+
+# Valor representativo de cada classe (centro do intervalo)
+CLASS_VALUES = np.array([0.15, 0.4, 0.6, 0.8, 0.95], dtype=np.float32)
+
+CODECS = ('float16', 'uint8', 'uint4', 'classes', 'classes4', 'rle')
+
+def quantize(map_data, bits=8):
+    """
+    Quantiza um mapa com valores em [0, 1] para inteiros sem sinal.
+
+    Args:
+        map_data (numpy.ndarray): Mapa com valores entre 0 e 1
+        bits (int): Número de bits por valor (até 8)
+
+    Returns:
+        numpy.ndarray: Mapa quantizado (uint8) com valores entre 0 e 2**bits - 1
+    """
+    levels = (1 << bits) - 1
+    return np.rint(np.clip(map_data, 0, 1) * levels).astype(np.uint8)
+
+def dequantize(quantized, bits=8):
+    """
+    Converte um mapa quantizado de volta para valores em [0, 1].
+
+    Args:
+        quantized (numpy.ndarray): Mapa quantizado
+        bits (int): Número de bits por valor usado na quantização
+
+    Returns:
+        numpy.ndarray: Mapa em float32
+    """
+    return np.asarray(quantized, dtype=np.float32) / ((1 << bits) - 1)
+
+def to_class_grid(difficulty_map):
+    """
+    Converte um mapa de dificuldade em uma grade de classes de elementos.
+
+    Args:
+        difficulty_map (numpy.ndarray): Mapa de dificuldade
+
+    Returns:
+        numpy.ndarray: Grade de classes (uint8) com valores entre 0 e 4
+    """
+    return np.digitize(difficulty_map, CLASS_THRESHOLDS).astype(np.uint8)
+
+def from_class_grid(classes):
+    """
+    Converte uma grade de classes no mapa de dificuldade representativo.
+
+    Args:
+        classes (numpy.ndarray): Grade de classes
+
+    Returns:
+        numpy.ndarray: Mapa de dificuldade em float32
+    """
+    return CLASS_VALUES[classes]
+
+def pack_uint4(values):
+    """
+    Empacota valores de 4 bits, dois por byte.
+
+    Args:
+        values (numpy.ndarray): Valores entre 0 e 15
+
+    Returns:
+        numpy.ndarray: Bytes empacotados (uint8, 1D)
+    """
+    flat = np.asarray(values, dtype=np.uint8).ravel()
+    if flat.size % 2:
+        flat = np.append(flat, np.uint8(0))
+    return (flat[0::2] << 4) | (flat[1::2] & 0x0F)
+
+def unpack_uint4(packed, shape):
+    """
+    Desempacota valores de 4 bits.
+
+    Args:
+        packed (numpy.ndarray): Bytes empacotados por `pack_uint4`
+        shape (tuple): Shape original
+
+    Returns:
+        numpy.ndarray: Valores (uint8) com o shape original
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    flat = np.empty(packed.size * 2, dtype=np.uint8)
+    flat[0::2] = packed >> 4
+    flat[1::2] = packed & 0x0F
+    return flat[:int(np.prod(shape))].reshape(shape)
+
+def rle_encode(labels):
+    """
+    Codifica uma grade de rótulos com run-length (em ordem de linhas).
+
+    Args:
+        labels (numpy.ndarray): Grade de rótulos inteiros
+
+    Returns:
+        tuple: (values, lengths) com o valor e o comprimento de cada sequência
+    """
+    flat = np.asarray(labels).ravel()
+    if flat.size == 0:
+        return flat.copy(), np.zeros(0, dtype=np.uint32)
+    starts = np.flatnonzero(np.concatenate(([True], flat[1:] != flat[:-1])))
+    lengths = np.diff(np.append(starts, flat.size)).astype(np.uint32)
+    return flat[starts], lengths
+
+def rle_decode(values, lengths, shape):
+    """
+    Decodifica uma grade codificada por `rle_encode`.
+
+    Args:
+        values (numpy.ndarray): Valor de cada sequência
+        lengths (numpy.ndarray): Comprimento de cada sequência
+        shape (tuple): Shape original
+
+    Returns:
+        numpy.ndarray: Grade de rótulos
+    """
+    return np.repeat(values, lengths).reshape(shape)
+
+def encode_map(map_data, codec='uint8'):
+    """
+    Codifica um mapa de dificuldade em um formato compacto.
+
+    Codecs disponíveis:
+        'float16'   Valores em meia precisão
+        'uint8'     Valores quantizados em 256 níveis
+        'uint4'     Valores quantizados em 16 níveis, dois por byte
+        'classes'   Grade de classes de elementos (uint8)
+        'classes4'  Grade de classes de elementos, duas por byte
+        'rle'       Grade de classes de elementos com run-length
+
+    Args:
+        map_data (numpy.ndarray): Mapa de dificuldade
+        codec (str): Nome do codec
+
+    Returns:
+        dict: Arrays que representam o mapa codificado
+    """
+    map_data = np.asarray(map_data)
+    encoded = {'codec': np.array(codec), 'shape': np.array(map_data.shape, dtype=np.int64)}
+    if codec == 'float16':
+        encoded['data'] = map_data.astype(np.float16)
+    elif codec == 'uint8':
+        encoded['data'] = quantize(map_data, bits=8)
+    elif codec == 'uint4':
+        encoded['data'] = pack_uint4(quantize(map_data, bits=4))
+    elif codec == 'classes':
+        encoded['data'] = to_class_grid(map_data)
+    elif codec == 'classes4':
+        encoded['data'] = pack_uint4(to_class_grid(map_data))
+    elif codec == 'rle':
+        encoded['values'], encoded['lengths'] = rle_encode(to_class_grid(map_data))
+    else:
+        raise ValueError(f"Codec desconhecido: {codec}")
+    return encoded
+
+def decode_map(encoded):
+    """
+    Decodifica um mapa gerado por `encode_map`.
+
+    Args:
+        encoded (dict): Arrays do mapa codificado
+
+    Returns:
+        numpy.ndarray: Mapa de dificuldade em float32
+    """
+    codec = str(encoded['codec'])
+    shape = tuple(int(n) for n in encoded['shape'])
+    if codec == 'float16':
+        return np.asarray(encoded['data'], dtype=np.float32)
+    elif codec == 'uint8':
+        return dequantize(encoded['data'], bits=8)
+    elif codec == 'uint4':
+        return dequantize(unpack_uint4(encoded['data'], shape), bits=4)
+    elif codec == 'classes':
+        return from_class_grid(encoded['data'])
+    elif codec == 'classes4':
+        return from_class_grid(unpack_uint4(encoded['data'], shape))
+    elif codec == 'rle':
+        return from_class_grid(rle_decode(encoded['values'], encoded['lengths'], shape))
+    raise ValueError(f"Codec desconhecido: {codec}")
+
+def save_bundle(filename, difficulty_map=None, visual_map=None, description=None, codec='uint8'):
+    """
+    Salva mapa de dificuldade, mapa visual e descrição em um único `.npz` comprimido.
+
+    Args:
+        filename (str): Arquivo de saída (.npz)
+        difficulty_map (numpy.ndarray, optional): Mapa de dificuldade
+        visual_map (numpy.ndarray, optional): Mapa visual RGB (uint8)
+        description (str, optional): Descrição textual do mapa
+        codec (str): Codec do mapa de dificuldade (ver `encode_map`)
+    """
+    arrays = {}
+    if difficulty_map is not None:
+        for key, value in encode_map(difficulty_map, codec).items():
+            arrays[f'difficulty_{key}'] = value
+    if visual_map is not None:
+        arrays['visual'] = np.asarray(visual_map, dtype=np.uint8)
+    if description is not None:
+        arrays['description'] = np.array(description)
+    np.savez_compressed(filename, **arrays)
+
+def load_bundle(filename):
+    """
+    Carrega um arquivo salvo por `save_bundle`.
+
+    Args:
+        filename (str): Arquivo `.npz`
+
+    Returns:
+        dict: Chaves 'difficulty', 'visual' e 'description' (None quando ausentes)
+    """
+    with np.load(filename) as bundle:
+        encoded = {key[len('difficulty_'):]: bundle[key]
+                   for key in bundle.files if key.startswith('difficulty_')}
+        return {
+            'difficulty': decode_map(encoded) if encoded else None,
+            'visual': bundle['visual'] if 'visual' in bundle.files else None,
+            'description': str(bundle['description']) if 'description' in bundle.files else None
+        }
@@ -1,22 +1,27 @@
 import numpy as np
-from scipy.ndimage import binary_dilation, binary_erosion
+from .morphology import closing
 
 def smooth_map(map_data, iterations=1):
     """
     Suaviza o mapa usando operações morfológicas.
     
+    Aplica um único fechamento em tons de cinza com um losango de raio
+    `iterations`, preservando os valores contínuos do mapa.
+
+    Diferente da versão anterior, que repetia o fechamento binário 3x3 e
+    retornava um mapa booleano: o resultado não é mais binarizado, e
+    `iterations` agora aumenta o raio do fechamento (fechando vãos maiores),
+    enquanto antes as iterações extras não tinham efeito, pois o fechamento
+    é idempotente.
+    
     Args:
-        map_data (numpy.ndarray): Dados do mapa
+        map_data (numpy.ndarray): Dados do mapa (H, W) ou lote de mapas (..., H, W)
         iterations (int): Número de iterações de suavização
         
     Returns:
         numpy.ndarray: Mapa suavizado
     """
-    smoothed = map_data.copy()
-    for _ in range(iterations):
-        smoothed = binary_dilation(smoothed)
-        smoothed = binary_erosion(smoothed)
-    return smoothed
+    return closing(map_data, radius=iterations, shape='diamond')
 
 def add_noise(map_data, intensity=0.1):
     """
@@ -92,4 +97,94 @@ def has_connected_paths(map_data):
     
     # Verifica se há pelo menos uma região grande o suficiente
     region_sizes = np.bincount(labeled_map.ravel())
-    return np.any(region_sizes > 0.1 * map_data.size) 
\ No newline at end of file
+    return np.any(region_sizes > 0.1 * map_data.size) 
+
+def _as_map_stack(maps):
+    """
+    Converte a entrada em uma pilha de mapas (N, H, W).
+    
+    Args:
+        maps (numpy.ndarray): Mapas com shape (N, H, W) ou (N, H, W, 1)
+        
+    Returns:
+        numpy.ndarray: Pilha de mapas com shape (N, H, W)
+    """
+    maps = np.asarray(maps)
+    if maps.ndim == 4 and maps.shape[-1] == 1:
+        maps = maps[..., 0]
+    if maps.ndim != 3:
+        raise ValueError(f"Esperado um array (N, H, W), recebido shape {maps.shape}")
+    return maps
+
+def calculate_difficulty_batch(maps):
+    """
+    Calcula a dificuldade de uma pilha de mapas de uma só vez.
+    
+    Equivalente a aplicar `calculate_difficulty` em cada mapa, mas usando
+    reduções vetorizadas sobre os eixos espaciais.
+    
+    Args:
+        maps (numpy.ndarray): Mapas com shape (N, H, W) ou (N, H, W, 1)
+        
+    Returns:
+        numpy.ndarray: Dificuldade de cada mapa (N,), valores entre 0 e 1
+    """
+    maps = _as_map_stack(maps)
+    if len(maps) == 0:
+        return np.zeros(0, dtype=np.float64)
+    flat = maps.reshape(len(maps), -1)
+    complexity = np.std(flat, axis=1)
+    obstacle_density = np.mean(flat > 0.5, axis=1)
+    return np.clip((complexity + obstacle_density) / 2, 0, 1)
+
+def has_connected_paths_batch(maps):
+    """
+    Verifica, para cada mapa da pilha, se há caminhos conectados.
+    
+    Todos os mapas são rotulados em uma única chamada de `label`, usando um
+    elemento estruturante sem conectividade ao longo do eixo do lote.
+    
+    Args:
+        maps (numpy.ndarray): Mapas com shape (N, H, W) ou (N, H, W, 1)
+        
+    Returns:
+        numpy.ndarray: Array booleano (N,) indicando os mapas com caminhos conectados
+    """
+    from scipy.ndimage import label, generate_binary_structure
+    
+    maps = _as_map_stack(maps)
+    if len(maps) == 0:
+        return np.zeros(0, dtype=bool)
+    
+    # Conectividade 2D em cada fatia, sem ligar mapas vizinhos no lote
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = generate_binary_structure(2, 1)
+    binary_maps = maps > 0.5
+    labeled_maps, _ = label(binary_maps, structure=structure)
+    
+    # Regiões grandes o suficiente em cada mapa
+    min_size = 0.1 * maps.shape[1] * maps.shape[2]
+    large_regions = np.bincount(labeled_maps.ravel()) > min_size
+    large_regions[0] = False
+    has_large_region = large_regions[labeled_maps].reshape(len(maps), -1).any(axis=1)
+    
+    # O rótulo 0 (fundo) também é contado em `has_connected_paths`, mas é
+    # compartilhado por todo o lote, então é contado por mapa
+    background_sizes = (~binary_maps).reshape(len(maps), -1).sum(axis=1)
+    return has_large_region | (background_sizes > min_size)
+
+def validate_map_batch(maps):
+    """
+    Valida uma pilha de mapas de uma só vez.
+    
+    Args:
+        maps (numpy.ndarray): Mapas com shape (N, H, W) ou (N, H, W, 1)
+        
+    Returns:
+        numpy.ndarray: Array booleano (N,) indicando os mapas jogáveis
+    """
+    maps = _as_map_stack(maps)
+    if len(maps) == 0:
+        return np.zeros(0, dtype=bool)
+    free_space = np.mean(maps.reshape(len(maps), -1) < 0.3, axis=1)
+    return has_connected_paths_batch(maps) & (free_space >= 0.2)
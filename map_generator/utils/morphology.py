@@ -0,0 +1,125 @@
+import numpy as np
+from scipy.ndimage import maximum_filter, minimum_filter
+
+def structuring_element(radius=1, shape='disk'):
+    """
+    Cria um elemento estruturante plano.
+
+    Args:
+        radius (int): Raio do elemento (o elemento tem lado 2 * radius + 1)
+        shape (str): Formato do elemento ('disk', 'diamond' ou 'square')
+
+    Returns:
+        numpy.ndarray: Máscara booleana (2 * radius + 1, 2 * radius + 1)
+    """
+    if radius < 0:
+        raise ValueError(f"Raio inválido: {radius}")
+
+    y, x = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+    if shape == 'disk':
+        return x * x + y * y <= radius * radius
+    elif shape == 'diamond':
+        return np.abs(x) + np.abs(y) <= radius
+    elif shape == 'square':
+        return np.ones((2 * radius + 1, 2 * radius + 1), dtype=bool)
+    raise ValueError(f"Formato de elemento estruturante desconhecido: {shape}")
+
+def _filter_kwargs(ndim, radius, shape):
+    """
+    Monta os argumentos de `minimum_filter`/`maximum_filter` para mapas em lote.
+
+    Os dois últimos eixos são espaciais; os eixos anteriores são tratados
+    como lote e nunca são misturados.
+
+    Args:
+        ndim (int): Número de dimensões da entrada
+        radius (int): Raio do elemento estruturante
+        shape (str): Formato do elemento estruturante
+
+    Returns:
+        dict: Argumentos `size` ou `footprint` para o filtro
+    """
+    if ndim < 2:
+        raise ValueError("A entrada precisa ter pelo menos 2 dimensões (H, W)")
+
+    batch_dims = (1,) * (ndim - 2)
+    if shape == 'square':
+        # Elemento quadrado é separável e usa o filtro 1D em cada eixo
+        return {'size': batch_dims + (2 * radius + 1, 2 * radius + 1)}
+    footprint = structuring_element(radius, shape)
+    return {'footprint': footprint.reshape(batch_dims + footprint.shape)}
+
+def dilation(map_data, radius=1, shape='disk', out=None, mode='nearest'):
+    """
+    Dilatação em tons de cinza (máximo local).
+
+    Args:
+        map_data (numpy.ndarray): Mapa (H, W) ou lote de mapas (..., H, W)
+        radius (int): Raio do elemento estruturante
+        shape (str): Formato do elemento ('disk', 'diamond' ou 'square')
+        out (numpy.ndarray, optional): Buffer de saída com o mesmo shape da entrada
+        mode (str): Tratamento das bordas (ver `scipy.ndimage`)
+
+    Returns:
+        numpy.ndarray: Mapa dilatado
+    """
+    map_data = np.asarray(map_data)
+    return maximum_filter(map_data, output=out, mode=mode,
+                          **_filter_kwargs(map_data.ndim, radius, shape))
+
+def erosion(map_data, radius=1, shape='disk', out=None, mode='nearest'):
+    """
+    Erosão em tons de cinza (mínimo local).
+
+    Args:
+        map_data (numpy.ndarray): Mapa (H, W) ou lote de mapas (..., H, W)
+        radius (int): Raio do elemento estruturante
+        shape (str): Formato do elemento ('disk', 'diamond' ou 'square')
+        out (numpy.ndarray, optional): Buffer de saída com o mesmo shape da entrada
+        mode (str): Tratamento das bordas (ver `scipy.ndimage`)
+
+    Returns:
+        numpy.ndarray: Mapa erodido
+    """
+    map_data = np.asarray(map_data)
+    return minimum_filter(map_data, output=out, mode=mode,
+                          **_filter_kwargs(map_data.ndim, radius, shape))
+
+def closing(map_data, radius=1, shape='disk', out=None, mode='nearest'):
+    """
+    Fechamento em tons de cinza (dilatação seguida de erosão).
+
+    Com o losango de raio r, a dilatação equivale a r dilatações com a cruz
+    3x3 (e a erosão, a r erosões). Isso não equivale a repetir r vezes o
+    fechamento 3x3: o fechamento é idempotente, então repeti-lo com o mesmo
+    elemento não muda o resultado.
+
+    Args:
+        map_data (numpy.ndarray): Mapa (H, W) ou lote de mapas (..., H, W)
+        radius (int): Raio do elemento estruturante
+        shape (str): Formato do elemento ('disk', 'diamond' ou 'square')
+        out (numpy.ndarray, optional): Buffer de saída com o mesmo shape da entrada
+        mode (str): Tratamento das bordas (ver `scipy.ndimage`)
+
+    Returns:
+        numpy.ndarray: Mapa após o fechamento
+    """
+    dilated = dilation(map_data, radius, shape, mode=mode)
+    return erosion(dilated, radius, shape, out=out, mode=mode)
+
+def opening(map_data, radius=1, shape='disk', out=None, mode='nearest'):
+    """
+    Abertura em tons de cinza (erosão seguida de dilatação).
+
+    Args:
+        map_data (numpy.ndarray): Mapa (H, W) ou lote de mapas (..., H, W)
+        radius (int): Raio do elemento estruturante
+        shape (str): Formato do elemento ('disk', 'diamond' ou 'square')
+        out (numpy.ndarray, optional): Buffer de saída com o mesmo shape da entrada
+        mode (str): Tratamento das bordas (ver `scipy.ndimage`)
+
+    Returns:
+        numpy.ndarray: Mapa após a abertura
+    """
+    eroded = erosion(map_data, radius, shape, mode=mode)
+    return dilation(eroded, radius, shape, out=out, mode=mode)
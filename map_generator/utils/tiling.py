@@ -0,0 +1,91 @@
+import numpy as np
+
+def tile_starts(length, tile, overlap):
+    """
+    Calcula as posições iniciais dos tiles ao longo de um eixo.
+
+    Args:
+        length (int): Comprimento do eixo
+        tile (int): Comprimento de cada tile
+        overlap (int): Sobreposição entre tiles vizinhos
+
+    Returns:
+        list: Posições iniciais, cobrindo todo o eixo (o último tile é
+            alinhado à borda)
+    """
+    if length <= tile:
+        return [0]
+    stride = max(tile - overlap, 1)
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] + tile < length:
+        starts.append(length - tile)
+    return starts
+
+def blend_window(tile_shape, overlap):
+    """
+    Cria os pesos de mistura de um tile: 1 no centro, rampa linear nas bordas.
+
+    Args:
+        tile_shape (tuple): Tamanho do tile (altura, largura)
+        overlap (int): Largura da rampa
+
+    Returns:
+        numpy.ndarray: Pesos (altura, largura), todos positivos
+    """
+    windows = []
+    for length in tile_shape:
+        window = np.ones(length, dtype=np.float32)
+        ramp_length = min(overlap, length // 2)
+        if ramp_length > 0:
+            ramp = np.arange(1, ramp_length + 1, dtype=np.float32) / (ramp_length + 1)
+            window[:ramp_length] = ramp
+            window[-ramp_length:] = ramp[::-1]
+        windows.append(window)
+    return np.outer(windows[0], windows[1])
+
+def tiled_generate(tile_fn, shape, tile_shape=(32, 32), overlap=8, source=None):
+    """
+    Gera um mapa grande costurando tiles sobrepostos com mistura linear.
+
+    Apenas o mapa de saída e os pesos acumulados ficam em memória, além de
+    um tile por vez.
+
+    Args:
+        tile_fn (callable): Função que retorna um tile (altura, largura[, 1]).
+            Recebe o recorte correspondente de `source`, ou nenhum argumento
+            se `source` for None
+        shape (tuple): Tamanho do mapa de saída (altura, largura)
+        tile_shape (tuple): Tamanho nativo do tile (altura, largura)
+        overlap (int): Sobreposição entre tiles vizinhos, em células
+        source (numpy.ndarray, optional): Mapa de entrada, recortado em tiles
+
+    Returns:
+        numpy.ndarray: Mapa (altura, largura[, 1]), com o mesmo número de
+            dimensões dos tiles
+    """
+    height, width = shape
+    tile_height, tile_width = tile_shape
+    # Mapas menores que o tile são gerados em um tile e recortados
+    canvas_shape = (max(height, tile_height), max(width, tile_width))
+    if source is not None and source.shape[:2] != canvas_shape:
+        pad = [(0, canvas_shape[0] - source.shape[0]), (0, canvas_shape[1] - source.shape[1])]
+        source = np.pad(source, pad + [(0, 0)] * (source.ndim - 2), mode='edge')
+
+    weights = blend_window(tile_shape, overlap)
+    accumulated = np.zeros(canvas_shape, dtype=np.float32)
+    total_weight = np.zeros(canvas_shape, dtype=np.float32)
+    keep_channel = False
+
+    for y in tile_starts(canvas_shape[0], tile_height, overlap):
+        for x in tile_starts(canvas_shape[1], tile_width, overlap):
+            window = (slice(y, y + tile_height), slice(x, x + tile_width))
+            tile = np.asarray(tile_fn(source[window]) if source is not None else tile_fn())
+            if tile.ndim == 3:
+                keep_channel = True
+                tile = tile[..., 0]
+            accumulated[window] += tile * weights
+            total_weight[window] += weights
+
+    accumulated /= total_weight
+    result = accumulated[:height, :width]
+    return result[..., np.newaxis] if keep_channel else result
@@ -1,197 +1,367 @@
+import hashlib
+import time
 import numpy as np
-from typing import List, Tuple, Dict
-import random
+from collections import deque
+from typing import Tuple, Dict
+from .morphology import dilation
+
+# Direções de adjacência (nome, dx, dy) e o índice da direção oposta
+DIRECTIONS = [('top', 0, -1), ('right', 1, 0), ('bottom', 0, 1), ('left', -1, 0)]
+OPPOSITE = [2, 3, 0, 1]
+
+def difficulty_priors(difficulty_map: np.ndarray, tiles: Dict[str, Dict],
+                      temperature: float = 0.1, min_weight: float = 0.0) -> np.ndarray:
+    """
+    Converte um mapa de dificuldade em pesos a priori por célula para o WFC.
+    
+    Cada célula é quantizada para o tile de valor mais próximo e recebe o
+    perfil de pesos desse tile, exp(-|valor_tile - valor_célula| / temperature),
+    de modo que existem no máximo tantos perfis distintos quanto tiles.
+    
+    Args:
+        difficulty_map (np.ndarray): Mapa de dificuldade (HxW)
+        tiles (Dict[str, Dict]): Tiles gerados por `MapElements.convert_to_tiles`
+        temperature (float): Quanto menor, mais o WFC segue o mapa de dificuldade
+        min_weight (float): Pesos abaixo deste valor são zerados, removendo o
+            tile das possibilidades da célula
+            
+    Returns:
+        np.ndarray: Pesos (H, W, número de tiles), na ordem das chaves de `tiles`
+    """
+    values = np.array([float(tile['value'].flat[0]) for tile in tiles.values()])
+    
+    # Quantiza cada célula para o tile de valor mais próximo
+    levels = np.abs(difficulty_map[..., np.newaxis] - values).argmin(axis=-1)
+    
+    # Perfil de pesos de cada nível
+    profiles = np.exp(-np.abs(values[:, np.newaxis] - values[np.newaxis, :]) / temperature)
+    profiles[profiles < min_weight] = 0.0
+    return profiles[levels]
+
+def refine_layout(difficulty_map: np.ndarray, tiles: Dict[str, Dict],
+                  temperature: float = 0.1, seed: int = None, timeout: float = None,
+                  return_status: bool = False, verbose: bool = True):
+    """
+    Refina um layout grosseiro (GAN/RL) com o WFC.
+    
+    Tiles que só podem ser vizinhos de si mesmos (paredes, água) formam as
+    regiões estruturais do layout. Essas células ficam fixas no tile do
+    layout e funcionam como borda do mapa (ver `frozen` em
+    `WaveFunctionCollapse`): as regras de adjacência valem entre as demais
+    células, resolvidas pelo WFC com os pesos a priori de `difficulty_priors`,
+    e são relaxadas apenas na fronteira com as regiões estruturais, que com
+    essas regras nunca poderia ser satisfeita.
+    
+    Args:
+        difficulty_map (np.ndarray): Mapa de dificuldade (HxW)
+        tiles (Dict[str, Dict]): Tiles gerados por `MapElements.convert_to_tiles`
+        temperature (float): Quanto menor, mais o WFC segue o mapa de dificuldade
+        seed (int, optional): Semente do WFC
+        timeout (float, optional): Tempo máximo do WFC, em segundos
+        return_status (bool): Se True, retorna também se o WFC terminou
+            respeitando as restrições entre as células não estruturais
+        verbose (bool): Se False, o WFC não imprime reinícios nem prazos esgotados
+        
+    Returns:
+        np.ndarray | tuple: Mapa refinado (HxW) com os valores dos tiles, ou
+            (mapa, completo) se `return_status`
+    """
+    names = list(tiles.keys())
+    values = np.array([float(tile['value'].flat[0]) for tile in tiles.values()], dtype=np.float32)
+    structural = np.array([all(allowed == [name] for allowed in tiles[name]['constraints'].values())
+                           for name in names])
+    
+    levels = np.abs(difficulty_map[..., np.newaxis] - values).argmin(axis=-1)
+    pinned = structural[levels]
+    if pinned.all():
+        layout = values[levels]
+        return (layout, True) if return_status else layout
+    
+    # Células estruturais fixadas no tile do layout; nas demais, os tiles
+    # estruturais ficam de fora
+    priors = difficulty_priors(difficulty_map, tiles, temperature)
+    priors[..., structural] = 0.0
+    priors[pinned] = np.eye(len(names))[levels[pinned]]
+    height, width = difficulty_map.shape
+    wfc = WaveFunctionCollapse(width, height, tiles, priors=priors, seed=seed, frozen=pinned,
+                               verbose=verbose)
+    refined, complete = wfc.generate(timeout=timeout, return_status=True)
+    return (refined, complete) if return_status else refined
+
+class RuleSet:
+    """
+    Regras de adjacência compiladas de um dicionário de tiles.
+    
+    Compilado uma única vez por conteúdo de tiles (ver `RuleSet.compile`) e
+    compartilhado entre instâncias do WFC.
+    """
+    
+    _cache = {}
+    
+    def __init__(self, tiles: Dict[str, Dict]):
+        """
+        Args:
+            tiles (Dict[str, Dict]): Dicionário de tiles, com 'value', 'weight'
+                e 'constraints' (ver `MapElements.convert_to_tiles`)
+        """
+        if not tiles:
+            raise ValueError("Nenhum tile disponível para o WFC")
+        
+        # A onda guarda, por célula, uma máscara de bits dos tiles possíveis
+        self.tile_names = list(tiles.keys())
+        num_tiles = len(self.tile_names)
+        if num_tiles > 63:
+            raise ValueError(f"O WFC suporta no máximo 63 tiles, recebidos {num_tiles}")
+        self.full_mask = (1 << num_tiles) - 1
+        
+        # Obtém o tamanho, os valores e os pesos dos tiles
+        first_tile = next(iter(tiles.values()))
+        self.tile_size = first_tile['value'].shape[0]
+        self.values = np.array([tile['value'][0, 0] for tile in tiles.values()], dtype=np.float32)
+        self.weights = np.array([tile['weight'] for tile in tiles.values()], dtype=np.float64)
+        
+        # Dois tiles são compatíveis em uma direção quando ambos se aceitam
+        # mutuamente (tile2 nas restrições de tile1 e vice-versa)
+        index = {name: i for i, name in enumerate(self.tile_names)}
+        self.compatible = [[0] * num_tiles for _ in DIRECTIONS]
+        for d, (direction, _, _) in enumerate(DIRECTIONS):
+            opposite = DIRECTIONS[OPPOSITE[d]][0]
+            for name, tile in tiles.items():
+                for other in tile['constraints'][direction]:
+                    if other in index and name in tiles[other]['constraints'][opposite]:
+                        self.compatible[d][index[name]] |= 1 << index[other]
+        self.compatible_tiles = [[np.flatnonzero(mask >> np.arange(num_tiles) & 1).tolist() for mask in masks]
+                                 for masks in self.compatible]
+        
+        # Consistência de arco sem restrições de borda: tiles que não têm
+        # vizinho possível em alguma direção só podem aparecer na borda
+        live_mask = sum(1 << t for t in range(num_tiles) if self.weights[t] > 0)
+        while True:
+            pruned = live_mask
+            for t in range(num_tiles):
+                if pruned >> t & 1 and not all(masks[t] & pruned for masks in self.compatible):
+                    pruned &= ~(1 << t)
+            if pruned == live_mask:
+                break
+            live_mask = pruned
+        self.live_mask = live_mask
+        self.dead_tiles = [name for t, name in enumerate(self.tile_names) if not live_mask >> t & 1]
+        self._lookup_tables = None
+    
+    def lookup_tables(self):
+        """
+        Retorna tabelas indexadas pela máscara de uma célula, para operar
+        sobre arrays de máscaras inteiros.
+        
+        Returns:
+            tuple | None: (vizinhos, contagem), onde vizinhos[d, máscara] é a
+                máscara dos tiles permitidos na direção d e contagem[máscara] o
+                número de tiles da máscara; None acima de 16 tiles
+        """
+        num_tiles = len(self.tile_names)
+        if num_tiles > 16:
+            return None
+        if self._lookup_tables is None:
+            masks = np.arange(1 << num_tiles, dtype=np.int64)
+            neighbors = np.zeros((len(DIRECTIONS), len(masks)), dtype=np.int64)
+            counts = np.zeros(len(masks), dtype=np.int16)
+            for t in range(num_tiles):
+                present = (masks >> t & 1).astype(bool)
+                counts += present
+                for d in range(len(DIRECTIONS)):
+                    neighbors[d, present] |= self.compatible[d][t]
+            self._lookup_tables = (neighbors, counts)
+        return self._lookup_tables
+    
+    @staticmethod
+    def content_hash(tiles: Dict[str, Dict]) -> str:
+        """
+        Calcula o hash do conteúdo de um dicionário de tiles.
+        
+        Args:
+            tiles (Dict[str, Dict]): Dicionário de tiles
+            
+        Returns:
+            str: Hash SHA-1 de nomes, valores, pesos e restrições
+        """
+        digest = hashlib.sha1()
+        for name, tile in tiles.items():
+            value = np.asarray(tile['value'])
+            digest.update(repr((name, value.shape, value.dtype.str, float(tile['weight']),
+                                sorted((d, list(v)) for d, v in tile['constraints'].items()))).encode())
+            digest.update(value.tobytes())
+        return digest.hexdigest()
+    
+    @classmethod
+    def compile(cls, tiles: Dict[str, Dict]) -> 'RuleSet':
+        """
+        Retorna as regras compiladas de um dicionário de tiles, reaproveitando
+        a compilação de dicionários com o mesmo conteúdo.
+        
+        Args:
+            tiles (Dict[str, Dict]): Dicionário de tiles
+            
+        Returns:
+            RuleSet: Regras compiladas
+        """
+        key = cls.content_hash(tiles)
+        rules = cls._cache.get(key)
+        if rules is None:
+            rules = cls._cache[key] = cls(tiles)
+        return rules
 
 class WaveFunctionCollapse:
-    def __init__(self, width: int, height: int, tiles: Dict[str, np.ndarray]):
+    def __init__(self, width: int, height: int, tiles: Dict[str, Dict], priors: np.ndarray = None,
+                 seed: int = None, frozen: np.ndarray = None, verbose: bool = True):
         """
         Inicializa o WFC.
         
         Args:
             width (int): Largura do mapa
             height (int): Altura do mapa
-            tiles (Dict[str, np.ndarray]): Dicionário de tiles disponíveis
+            tiles (Dict[str, Dict]): Dicionário de tiles disponíveis, com 'value',
+                'weight' e 'constraints' (ver `MapElements.convert_to_tiles`)
+            priors (np.ndarray, optional): Pesos a priori (H, W, número de tiles),
+                na ordem das chaves de `tiles`, que multiplicam o peso de cada
+                tile em cada célula; tiles com peso zero são descartados da célula
+            seed (int, optional): Semente do gerador aleatório
+            frozen (np.ndarray, optional): Máscara booleana (H, W) de células
+                mantidas no único tile permitido pelos seus priors e tratadas
+                como borda do mapa: as restrições de adjacência entre elas e as
+                vizinhas não são aplicadas
+            verbose (bool): Se False, não imprime reinícios nem prazos esgotados
+            
+        Raises:
+            ValueError: Se as regras e os priors forem insatisfatíveis
         """
         self.width = width
         self.height = height
         self.tiles = tiles
+        self.verbose = verbose
         
-        # Verifica se há tiles disponíveis
-        if not tiles:
-            raise ValueError("Nenhum tile disponível para o WFC")
-            
-        # Obtém o tamanho do tile
-        first_tile = next(iter(tiles.values()))
-        self.tile_size = first_tile.shape[0]
+        # Regras compiladas, compartilhadas entre instâncias com os mesmos tiles
+        self.rules = RuleSet.compile(tiles)
+        self.tile_names = self.rules.tile_names
+        self.tile_size = self.rules.tile_size
+        self.values = self.rules.values
+        self.weights = self.rules.weights
+        self.full_mask = self.rules.full_mask
+        self.compatible = self.rules.compatible
+        self.compatible_tiles = self.rules.compatible_tiles
+        num_tiles = len(self.tile_names)
+        
+        # Pesos a priori por célula, deduplicados em perfis
+        if priors is None:
+            self.prior_profiles = np.ones((1, num_tiles))
+            self.prior_index = np.zeros((height, width), dtype=np.intp)
+        else:
+            if priors.shape != (height, width, num_tiles):
+                raise ValueError(f"Priors com shape {priors.shape}, esperado {(height, width, num_tiles)}")
+            self.prior_profiles, inverse = np.unique(priors.reshape(-1, num_tiles), axis=0, return_inverse=True)
+            self.prior_index = inverse.reshape(height, width)
+        
+        # Onda inicial: tiles com peso a priori positivo
+        profile_masks = ((self.prior_profiles > 0) << np.arange(num_tiles)).sum(axis=1)
+        self.initial_wave = profile_masks[self.prior_index].astype(np.int64)
         
-        # Inicializa a grade de possibilidades
-        self.grid = np.zeros((self.height, self.width), dtype=object)
-        for y in range(self.height):
-            for x in range(self.width):
-                self.grid[y, x] = set(tiles.keys())
+        self.frozen = np.zeros((height, width), dtype=bool) if frozen is None else np.asarray(frozen, dtype=bool)
+        if self.frozen.shape != (height, width):
+            raise ValueError(f"Máscara de células fixas com shape {self.frozen.shape}, esperado {(height, width)}")
+        frozen_masks = self.initial_wave[self.frozen]
+        if np.any((frozen_masks == 0) | (frozen_masks & (frozen_masks - 1) != 0)):
+            raise ValueError("Cada célula fixa precisa de exatamente um tile com peso a priori positivo")
         
-        # Define as regras de adjacência
-        self.rules = self._generate_rules()
+        self.rng = np.random.default_rng(seed)
+        # Tabelas de pesos acumulados por (perfil a priori, máscara)
+        self._cumulative_weights = {}
+        # Índices dos tiles da última geração
+        self.solution = None
         
-    def _generate_rules(self) -> Dict[str, Dict[str, List[str]]]:
+        # Consistência de arco na onda inicial, feita uma única vez
+        self._prune_initial_wave()
+    
+    def _pick_tile(self, x: int, y: int, mask: int) -> int:
         """
-        Gera as regras de adjacência entre os tiles.
+        Sorteia um tile da célula, ponderado pelos pesos e pelos priors.
         
-        Returns:
-            Dict[str, Dict[str, List[str]]]: Regras de adjacência
-        """
-        rules = {}
-        tile_types = list(self.tiles.keys())
-        
-        for tile_name in tile_types:
-            rules[tile_name] = {
-                'top': [],
-                'right': [],
-                'bottom': [],
-                'left': []
-            }
+        Args:
+            x (int): Coordenada x da célula
+            y (int): Coordenada y da célula
+            mask (int): Máscara dos tiles possíveis da célula
             
-            # Define regras específicas para cada tipo de tile
-            if 'floor' in tile_name:
-                # Piso pode se conectar com qualquer coisa exceto água
-                for other_tile in tile_types:
-                    if 'water' not in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-            elif 'wall' in tile_name:
-                # Paredes se conectam com paredes e portas
-                for other_tile in tile_types:
-                    if 'wall' in other_tile or 'door' in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-            elif 'door' in tile_name:
-                # Portas se conectam com paredes e pisos
-                for other_tile in tile_types:
-                    if 'wall' in other_tile or 'floor' in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-            elif 'path' in tile_name:
-                # Caminhos se conectam com pisos e outros caminhos
-                for other_tile in tile_types:
-                    if 'floor' in other_tile or 'path' in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-            elif 'water' in tile_name:
-                # Água se conecta apenas com água e alguns tipos de piso
-                for other_tile in tile_types:
-                    if 'water' in other_tile or 'floor' in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-            elif 'enemy' in tile_name:
-                # Inimigos só podem estar em pisos e caminhos
-                for other_tile in tile_types:
-                    if 'floor' in other_tile or 'path' in other_tile:
-                        for direction in ['top', 'right', 'bottom', 'left']:
-                            rules[tile_name][direction].append(other_tile)
-                            
-        return rules
+        Returns:
+            int: Índice do tile escolhido
+        """
+        key = (self.prior_index[y, x], mask)
+        table = self._cumulative_weights.get(key)
+        if table is None:
+            candidates = np.flatnonzero(mask >> np.arange(len(self.tile_names)) & 1)
+            table = (candidates, np.cumsum(self.weights[candidates] * self.prior_profiles[key[0], candidates]))
+            self._cumulative_weights[key] = table
+        candidates, cumulative = table
+        return candidates[np.searchsorted(cumulative, self.rng.random() * cumulative[-1], side='right')]
     
-    def _get_lowest_entropy_cell(self) -> tuple[int, int]:
+    def _lowest_entropy_cell(self):
         """
-        Retorna a célula com menor entropia (menos possibilidades).
+        Retorna a célula não colapsada com menos possibilidades.
         
         Returns:
-            tuple[int, int]: Coordenadas (x, y) da célula com menor entropia
+            tuple[int, int] | None: Coordenadas (x, y), sorteadas entre as
+                empatadas, ou None se todas as células estiverem colapsadas
+        """
+        open_counts = np.where(self.counts > 1, self.counts, np.iinfo(self.counts.dtype).max)
+        min_entropy = open_counts.min()
+        if min_entropy == np.iinfo(self.counts.dtype).max:
+            return None
+        candidates = np.flatnonzero(open_counts == min_entropy)
+        y, x = divmod(int(candidates[self.rng.integers(len(candidates))]), self.width)
+        return x, y
+    
+    def _init_supports(self) -> None:
         """
-        min_entropy = float('inf')
-        candidates = []
+        Conta, para cada célula, direção e tile, quantos tiles do vizinho
+        naquela direção ainda o suportam (contadores do AC-4).
         
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.grid[y][x] is None:
-                    continue
-                    
-                possibilities = self.grid[y][x]
-                entropy = len(possibilities)
-                
-                if entropy < min_entropy:
-                    min_entropy = entropy
-                    candidates = [(x, y)]
-                elif entropy == min_entropy:
-                    candidates.append((x, y))
-        
-        if not candidates:
-            raise ValueError("Nenhuma célula disponível para colapso")
-            
-        # Se houver empate, escolhe a célula com mais vizinhos já colapsados
-        if len(candidates) > 1:
-            max_neighbors = -1
-            best_candidates = []
-            
-            for x, y in candidates:
-                neighbors = 0
-                for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.width and 0 <= ny < self.height:
-                        if self.grid[ny][nx] is not None:
-                            neighbors += 1
-                            
-                if neighbors > max_neighbors:
-                    max_neighbors = neighbors
-                    best_candidates = [(x, y)]
-                elif neighbors == max_neighbors:
-                    best_candidates.append((x, y))
-                    
-            candidates = best_candidates
-            
-        return random.choice(candidates)
+        Direções fora do grid ou que levam a uma célula fixa (e todas as
+        direções das células fixas) recebem um suporte que nunca chega a zero.
+        """
+        num_tiles = len(self.tile_names)
+        bits = [(self.wave >> t & 1).astype(np.int32) for t in range(num_tiles)]
+        self.supports = np.full((self.height, self.width, len(DIRECTIONS), num_tiles), num_tiles + 1, dtype=np.int32)
+        for d, (_, dx, dy) in enumerate(DIRECTIONS):
+            # Recorte das células com vizinho na direção d e dos respectivos vizinhos
+            cells = (slice(max(-dy, 0), self.height - max(dy, 0)), slice(max(-dx, 0), self.width - max(dx, 0)))
+            neighbors = (slice(max(dy, 0), self.height + min(dy, 0)), slice(max(dx, 0), self.width + min(dx, 0)))
+            for t, compatible in enumerate(self.compatible_tiles[d]):
+                support = np.zeros((self.height, self.width), dtype=np.int32)
+                for other in compatible:
+                    support += bits[other]
+                self.supports[cells + (d, t)] = support[neighbors]
+            # Células cujo vizinho na direção d está fixo
+            self.supports[cells + (d,)][self.frozen[neighbors]] = num_tiles + 1
+        self.supports[self.frozen] = num_tiles + 1
     
-    def _propagate(self, x: int, y: int) -> None:
+    def _ban(self, x: int, y: int, tile: int) -> None:
         """
-        Propaga as restrições após o colapso de uma célula.
+        Remove um tile das possibilidades de uma célula e enfileira a remoção.
         
         Args:
             x (int): Coordenada x da célula
             y (int): Coordenada y da célula
-        """
-        stack = [(x, y)]
-        visited = set()
-        
-        while stack:
-            current_x, current_y = stack.pop()
-            if (current_x, current_y) in visited:
-                continue
-                
-            visited.add((current_x, current_y))
-            current_tile = self.grid[current_y][current_x]
+            tile (int): Índice do tile removido
             
-            # Verifica vizinhos em todas as direções
-            for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-                nx, ny = current_x + dx, current_y + dy
-                
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.grid[ny][nx] is None:
-                        continue
-                        
-                    # Obtém as possibilidades atuais do vizinho
-                    neighbor_possibilities = self.grid[ny][nx]
-                    if not neighbor_possibilities:
-                        continue
-                        
-                    # Calcula as novas possibilidades baseadas nas regras
-                    new_possibilities = set()
-                    for neighbor_tile in neighbor_possibilities:
-                        if self._check_compatibility(current_tile, neighbor_tile, dx, dy):
-                            new_possibilities.add(neighbor_tile)
-                            
-                    # Se houve mudança nas possibilidades, atualiza e adiciona à pilha
-                    if new_possibilities != neighbor_possibilities:
-                        self.grid[ny][nx] = new_possibilities
-                        stack.append((nx, ny))
-                        
-                        # Se não houver mais possibilidades, levanta erro
-                        if not new_possibilities:
-                            raise ValueError("Contradição encontrada durante propagação")
+        Raises:
+            ValueError: Se a célula ficar sem tiles possíveis
+        """
+        self.wave[y, x] &= ~(1 << tile)
+        self.counts[y, x] -= 1
+        if self.counts[y, x] <= 1:
+            if self.counts[y, x] == 0:
+                raise ValueError(f"Contradição encontrada durante propagação em ({x}, {y})")
+            # Célula decidida: registra para o próximo passo de `generate_steps`
+            self._decided_cells.append(y * self.width + x)
+            self._decided_tiles.append(int(self.wave[y, x]).bit_length() - 1)
+        self._removals.append((x, y, tile))
     
     def _collapse_cell(self, x: int, y: int) -> None:
         """
@@ -201,196 +371,296 @@ class WaveFunctionCollapse:
             x (int): Coordenada x da célula
             y (int): Coordenada y da célula
         """
-        # Obtém os tiles possíveis
-        possible_tiles = list(self.possible_tiles[(x, y)])
-        
-        # Se não houver tiles possíveis, levanta uma exceção
-        if not possible_tiles:
-            raise ValueError(f"Nenhum tile possível encontrado para a célula ({x}, {y})")
-            
-        # Escolhe um tile aleatório baseado nos pesos
-        weights = [self.tiles[tile]['weight'] for tile in possible_tiles]
-        total_weight = sum(weights)
-        probabilities = [w/total_weight for w in weights]
-        
-        # Escolhe o tile baseado nas probabilidades
-        chosen_tile = np.random.choice(possible_tiles, p=probabilities)
-        
-        # Atualiza o grid
-        self.grid[y][x] = chosen_tile
+        mask = int(self.wave[y, x])
+        tile = self._pick_tile(x, y, mask)
+        for other in range(len(self.tile_names)):
+            if other != tile and mask >> other & 1:
+                self._ban(x, y, other)
         
         # Propaga as restrições
-        self._propagate_constraints(x, y)
+        self._propagate_constraints()
     
-    def _propagate_constraints(self, x: int, y: int) -> None:
+    def _propagate_constraints(self) -> None:
         """
-        Propaga as restrições para as células vizinhas.
+        Propaga as remoções enfileiradas (AC-4).
         
-        Args:
-            x (int): Coordenada x da célula
-            y (int): Coordenada y da célula
-        """
-        # Lista de células para processar
-        to_process = [(x, y)]
-        processed = set()
+        Cada remoção de um tile decrementa o suporte dos tiles compatíveis nos
+        vizinhos; tiles cujo suporte chega a zero são removidos e enfileirados,
+        até não haver mais remoções.
         
-        while to_process:
-            current_x, current_y = to_process.pop(0)
-            if (current_x, current_y) in processed:
-                continue
-                
-            processed.add((current_x, current_y))
-            current_tile = self.grid[current_y][current_x]
-            
-            # Verifica os vizinhos
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = current_x + dx, current_y + dy
-                
-                # Verifica se está dentro dos limites
+        Raises:
+            ValueError: Se alguma célula ficar sem tiles possíveis
+        """
+        removals = self._removals
+        supports = self.supports
+        wave = self.wave
+        while removals:
+            x, y, tile = removals.popleft()
+            for d, (_, dx, dy) in enumerate(DIRECTIONS):
+                nx, ny = x + dx, y + dy
                 if not (0 <= nx < self.width and 0 <= ny < self.height):
                     continue
-                    
-                # Se a célula já foi processada, pula
-                if (nx, ny) in processed:
-                    continue
-                    
-                # Obtém os tiles possíveis antes da propagação
-                old_possible = self.possible_tiles[(nx, ny)]
-                
-                # Filtra os tiles possíveis baseado nas restrições
-                new_possible = set()
-                for tile in old_possible:
-                    if self._check_compatibility(current_tile, tile, dx, dy):
-                        new_possible.add(tile)
-                
-                # Se houve mudança, atualiza e adiciona à lista de processamento
-                if new_possible != old_possible:
-                    self.possible_tiles[(nx, ny)] = new_possible
-                    to_process.append((nx, ny))
-                    
-                # Se não houver tiles possíveis, levanta uma exceção
-                if not new_possible:
-                    raise ValueError(f"Contradição encontrada durante propagação em ({nx}, {ny})")
+                # Os tiles do vizinho compatíveis com `tile` perdem um suporte
+                # na direção oposta
+                neighbor_support = supports[ny, nx, OPPOSITE[d]]
+                for other in self.compatible_tiles[d][tile]:
+                    neighbor_support[other] -= 1
+                    if neighbor_support[other] == 0 and wave[ny, nx] >> other & 1:
+                        self._ban(nx, ny, other)
     
-    def _check_compatibility(self, tile1: str, tile2: str, dx: int, dy: int) -> bool:
+    def _prune_initial_wave(self) -> None:
         """
-        Verifica se dois tiles são compatíveis em uma determinada direção.
+        Aplica a consistência de arco (AC-4) à onda inicial, removendo os tiles
+        que não podem fazer parte de nenhuma solução dadas as regras e os priors.
         
-        Args:
-            tile1 (str): Nome do primeiro tile
-            tile2 (str): Nome do segundo tile
-            dx (int): Diferença em x entre os tiles
-            dy (int): Diferença em y entre os tiles
-            
-        Returns:
-            bool: True se os tiles são compatíveis, False caso contrário
-        """
-        # Obtém as restrições dos tiles
-        if dx == 1:  # Direita
-            return tile2 in self.tiles[tile1]['constraints']['right']
-        elif dx == -1:  # Esquerda
-            return tile2 in self.tiles[tile1]['constraints']['left']
-        elif dy == 1:  # Baixo
-            return tile2 in self.tiles[tile1]['constraints']['bottom']
-        elif dy == -1:  # Cima
-            return tile2 in self.tiles[tile1]['constraints']['top']
-            
-        return False
+        O resultado é guardado e reaproveitado a cada reinício.
+        
+        Raises:
+            ValueError: Se a configuração for insatisfatível
+        """
+        if not self.rules.live_mask and self.width >= 3 and self.height >= 3:
+            raise ValueError("Configuração insatisfatível: nenhum tile pode ocupar o interior do mapa "
+                             f"(tiles sem vizinhos possíveis: {self.rules.dead_tiles})")
+        
+        # Tiles com peso zero nunca são sorteados
+        positive = sum(1 << t for t in range(len(self.tile_names)) if self.weights[t] > 0)
+        self.wave = self.initial_wave & positive
+        self.counts = np.zeros((self.height, self.width), dtype=np.int16)
+        for t in range(len(self.tile_names)):
+            self.counts += (self.wave >> t & 1).astype(np.int16)
+        
+        try:
+            if not self.counts.all():
+                raise ValueError("célula sem tiles possíveis")
+            self._init_supports()
+            self._removals = deque()
+            self._decided_cells, self._decided_tiles = [], []
+            present = (self.wave[..., np.newaxis] >> np.arange(len(self.tile_names)) & 1).astype(bool)
+            unsupported = present & (self.supports == 0).any(axis=2)
+            for y, x, tile in np.argwhere(unsupported):
+                if self.wave[y, x] >> tile & 1:
+                    self._ban(int(x), int(y), int(tile))
+            self._propagate_constraints()
+        except ValueError as e:
+            raise ValueError(f"Configuração insatisfatível: {e}") from None
+        
+        self.initial_wave = self.wave.copy()
+        self._initial_counts = self.counts.copy()
+        self._initial_supports = self.supports.copy()
     
-    def generate(self) -> np.ndarray:
+    def generate(self, max_restarts: int = 100, timeout: float = None, return_status: bool = False):
         """
         Gera um mapa usando o algoritmo Wave Function Collapse.
         
+        Args:
+            max_restarts (int): Número máximo de reinícios após contradições
+            timeout (float, optional): Tempo máximo, em segundos; ao esgotar,
+                retorna o melhor mapa parcial encontrado
+            return_status (bool): Se True, retorna também se o mapa respeita
+                todas as restrições
+        
         Returns:
-            np.ndarray: Mapa gerado
+            np.ndarray | tuple: Mapa gerado, ou (mapa, completo) se
+                `return_status`; os índices dos tiles ficam em `self.solution`
+            
+        Raises:
+            RuntimeError: Se nenhuma solução for encontrada dentro do limite de reinícios
         """
-        # Inicializa o grid com todos os tiles possíveis
-        self.grid = np.full((self.height, self.width), None, dtype=object)
-        self.possible_tiles = {(x, y): set(self.tiles.keys()) 
-                             for x in range(self.width) 
-                             for y in range(self.height)}
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for _ in self.generate_steps(batch_size=None, max_restarts=max_restarts, deadline=deadline):
+            pass
+        result = self.values[self.solution]
+        return (result, self.complete) if return_status else result
+    
+    def generate_steps(self, batch_size: int = 16, max_restarts: int = 100, deadline: float = None):
+        """
+        Gera um mapa passo a passo, para pré-visualização progressiva.
         
-        try:
-            # Colapsa células até que todas estejam definidas
-            while None in self.grid:
-                # Encontra a célula com menor entropia
-                min_entropy = float('inf')
-                min_cells = []
-                
-                for y in range(self.height):
-                    for x in range(self.width):
-                        if self.grid[y, x] is None:
-                            entropy = len(self.possible_tiles[(x, y)])
-                            if entropy == 0:
-                                raise ValueError(f"Célula ({x}, {y}) sem tiles possíveis")
-                            if entropy < min_entropy:
-                                min_entropy = entropy
-                                min_cells = [(x, y)]
-                            elif entropy == min_entropy:
-                                min_cells.append((x, y))
-                
-                if not min_cells:
-                    break
-                    
-                # Escolhe uma célula aleatória entre as de menor entropia
-                x, y = random.choice(min_cells)
-                
-                # Colapsa a célula
-                self._collapse_cell(x, y)
+        Cada passo traz apenas as células decididas desde o passo anterior,
+        por colapso ou por propagação. Se o prazo acabar, a geração para,
+        `self.complete` fica False e `self.solution` recebe o melhor mapa
+        parcial, com as células indecididas no tile de maior peso.
+        
+        Args:
+            batch_size (int, optional): Número de colapsos por passo; None
+                produz um único passo, ao final
+            max_restarts (int): Número máximo de reinícios após contradições
+            deadline (float, optional): Prazo, no relógio de `time.perf_counter`
+            
+        Yields:
+            tuple: (cells, tiles, restarted), onde cells são os índices planos
+                (y * width + x) das células decididas, tiles os índices dos seus
+                tiles e restarted é True no primeiro passo após um reinício
+                (as células recebidas antes dele devem ser descartadas)
                 
-        except ValueError as e:
-            # Se encontrar uma contradição, reinicia a geração
-            print(f"Contradição encontrada: {e}. Reiniciando geração...")
-            return self.generate()
+        Raises:
+            RuntimeError: Se nenhuma solução for encontrada dentro do limite de reinícios
+        """
+        self.complete = False
+        restarted = False
+        best_wave, best_decided = None, -1
+        for _ in range(max_restarts + 1):
+            try:
+                for cells, tiles in self._solve(batch_size, deadline):
+                    yield cells, tiles, restarted
+                    restarted = False
+                self.complete = True
+                return
+            except ValueError as e:
+                # Se encontrar uma contradição, reinicia a geração
+                if self.verbose:
+                    print(f"Contradição encontrada: {e}. Reiniciando geração...")
+                restarted = True
+            except TimeoutError:
+                pass
             
-        # Converte o grid para um array numpy
-        result = np.zeros((self.height, self.width), dtype=np.float32)
-        for y in range(self.height):
-            for x in range(self.width):
-                tile_name = self.grid[y, x]
-                result[y, x] = self.tiles[tile_name]['value'][0, 0]
+            # Guarda a tentativa com mais células decididas
+            decided = np.count_nonzero(self.counts == 1)
+            if decided > best_decided:
+                best_wave, best_decided = self.wave.copy(), decided
+            if deadline is not None and time.perf_counter() >= deadline:
+                if self.verbose:
+                    print(f"Prazo esgotado com {best_decided} de {self.width * self.height} células decididas")
+                self.solution = self._best_effort_solution(best_wave)
+                return
+        raise RuntimeError(f"O WFC não encontrou solução após {max_restarts} reinícios")
+    
+    def _best_effort_solution(self, wave: np.ndarray) -> np.ndarray:
+        """
+        Completa uma onda parcial com o tile de maior peso de cada célula,
+        sem garantir as restrições de adjacência.
+        
+        Args:
+            wave (np.ndarray): Onda (H, W); células sem tiles usam todos os
+                tiles permitidos pelos priors
                 
-        return result
-
-    def _get_possible_tiles(self, x: int, y: int) -> List[str]:
+        Returns:
+            np.ndarray: Índices dos tiles (H, W)
         """
-        Obtém os tiles possíveis para uma célula considerando as restrições dos vizinhos.
+        present = wave[..., np.newaxis] >> np.arange(len(self.tile_names)) & 1
+        scores = self.weights * self.prior_profiles[self.prior_index]
+        scores = np.where(wave[..., np.newaxis] != 0, scores * present, scores)
+        return scores.argmax(axis=-1)
+    
+    def _cell_mask(self, cells) -> np.ndarray:
+        """Converte uma máscara booleana (H, W) ou lista de (x, y) em máscara booleana."""
+        if isinstance(cells, np.ndarray) and cells.dtype == bool:
+            if cells.shape != (self.height, self.width):
+                raise ValueError(f"Máscara com shape {cells.shape}, esperado {(self.height, self.width)}")
+            return cells
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        for x, y in cells:
+            mask[y, x] = True
+        return mask
+    
+    def resolve(self, dirty, pinned=None, solution: np.ndarray = None, radius: int = 2,
+                max_restarts: int = 10) -> np.ndarray:
+        """
+        Re-resolve apenas a vizinhança de células editadas de uma solução existente.
+        
+        As células a até `radius` (distância de Chebyshev) das editadas voltam
+        a ter todos os tiles permitidos pelos priors e são resolvidas de novo,
+        com o resto do mapa fixo como borda. Se não houver solução, o raio
+        dobra até cobrir o mapa inteiro.
         
         Args:
-            x (int): Coordenada x da célula
-            y (int): Coordenada y da célula
+            dirty: Células editadas, como máscara booleana (H, W) ou lista de (x, y)
+            pinned: Células fixadas no tile atual de `solution`, no mesmo
+                formato (padrão: as próprias células editadas)
+            solution (np.ndarray, optional): Índices dos tiles (H, W) do mapa
+                editado (padrão: `self.solution`, da última geração)
+            radius (int): Raio inicial da região re-resolvida
+            max_restarts (int): Número máximo de reinícios para cada raio
             
         Returns:
-            List[str]: Lista de tiles possíveis
-        """
-        # Se a célula já foi colapsada, retorna apenas o tile atual
-        if self.grid[y][x] is not None:
-            return [self.grid[y][x]]
+            np.ndarray: Mapa atualizado; os índices dos tiles ficam em `self.solution`
             
-        # Inicia com todos os tiles possíveis
-        possible_tiles = list(self.tiles.keys())
+        Raises:
+            ValueError: Se as células fixadas forem incompatíveis entre si, ou
+                se não houver solução informada nem gerada
+        """
+        if solution is None and self.solution is None:
+            raise ValueError("Nenhuma solução para re-resolver: chame generate() ou informe `solution`")
+        solution = np.array(self.solution if solution is None else solution, dtype=np.intp)
+        dirty = self._cell_mask(dirty)
+        pinned = dirty if pinned is None else self._cell_mask(pinned)
+        ys, xs = np.nonzero(dirty)
         
-        # Verifica as restrições dos vizinhos
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            nx, ny = x + dx, y + dy
+        while len(ys):
+            # Janela com a região re-resolvida e um anel de células fixas em volta
+            top, bottom = max(ys.min() - radius - 1, 0), min(ys.max() + radius + 2, self.height)
+            left, right = max(xs.min() - radius - 1, 0), min(xs.max() + radius + 2, self.width)
+            window = (slice(top, bottom), slice(left, right))
+            reset = dilation(dirty[window], radius, shape='square', mode='constant') & ~pinned[window]
+            reset &= ~self.frozen[window]
             
-            # Se o vizinho estiver fora dos limites, pula
-            if not (0 <= nx < self.width and 0 <= ny < self.height):
-                continue
-                
-            # Se o vizinho não foi colapsado, pula
-            if self.grid[ny][nx] is None:
-                continue
-                
-            # Filtra os tiles possíveis baseado no vizinho
-            neighbor_tile = self.grid[ny][nx]
-            possible_tiles = [
-                tile for tile in possible_tiles
-                if self._check_compatibility(tile, neighbor_tile, dx, dy)
-            ]
+            # Células fora da região recebem um prior que só permite o tile atual
+            fixed = np.eye(len(self.tile_names))[solution[window]]
+            priors = np.where(reset[..., np.newaxis], self.prior_profiles[self.prior_index[window]], fixed)
+            try:
+                region = WaveFunctionCollapse(right - left, bottom - top, self.tiles, priors=priors,
+                                              frozen=self.frozen[window], verbose=self.verbose)
+                region.rng = self.rng
+                region.generate(max_restarts)
+                solution[window] = region.solution
+                break
+            except (ValueError, RuntimeError) as e:
+                if radius >= max(self.width, self.height):
+                    raise ValueError(f"Não há solução compatível com as células fixadas: {e}") from None
+                if self.verbose:
+                    print(f"Sem solução com raio {radius}: {e}. Ampliando a região...")
+                radius = max(2 * radius, 1)
+        
+        self.solution = solution
+        return self.values[solution]
+    
+    def _take_decided(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna e esvazia as células decididas desde a última chamada."""
+        cells = np.array(self._decided_cells, dtype=np.intp)
+        tiles = np.array(self._decided_tiles, dtype=np.intp)
+        self._decided_cells, self._decided_tiles = [], []
+        return cells, tiles
+    
+    def _solve(self, batch_size: int = None, deadline: float = None):
+        """
+        Executa uma tentativa completa de colapso da onda.
+        
+        Args:
+            batch_size (int, optional): Número de colapsos entre os passos
+            deadline (float, optional): Prazo, no relógio de `time.perf_counter`
             
-            # Se não houver tiles possíveis, retorna lista vazia
-            if not possible_tiles:
-                return []
-                
-        return possible_tiles 
\ No newline at end of file
+        Yields:
+            tuple: (cells, tiles) decididos desde o passo anterior
+        
+        Raises:
+            ValueError: Se uma contradição for encontrada
+            TimeoutError: Se o prazo acabar
+        """
+        self.wave = self.initial_wave.copy()
+        self.counts = self._initial_counts.copy()
+        self.supports = self._initial_supports.copy()
+        self._removals = deque()
+        
+        # Células já decididas na onda inicial entram no primeiro passo
+        decided = np.flatnonzero(self.counts == 1)
+        self._decided_cells = decided.tolist()
+        self._decided_tiles = [int(mask).bit_length() - 1 for mask in self.wave.ravel()[decided]]
+        
+        # Colapsa células até que todas estejam definidas
+        collapses = 0
+        while True:
+            cell = self._lowest_entropy_cell()
+            if cell is None:
+                break
+            self._collapse_cell(*cell)
+            collapses += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                raise TimeoutError("Prazo esgotado")
+            if batch_size and collapses % batch_size == 0:
+                yield self._take_decided()
+        
+        # Converte a onda colapsada em índices dos tiles
+        self.solution = np.zeros((self.height, self.width), dtype=np.intp)
+        for t in range(1, len(self.tile_names)):
+            self.solution[self.wave == 1 << t] = t
+        yield self._take_decided()
@@ -0,0 +1,42 @@
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from map_generator.utils.map_elements import MapElements
+from map_generator.utils.wfc import DIRECTIONS, RuleSet, refine_layout
+
+def _smooth_layout(seed, size=16):
+    """Layout suave em [0, 1], parecido com a saída da GAN/RL."""
+    rng = np.random.default_rng(seed)
+    layout = gaussian_filter(rng.random((size, size)), 1.5)
+    return (layout - layout.min()) / (layout.max() - layout.min())
+
+def _violations(refined, tiles, exempt):
+    """Conta as adjacências que violam as regras, fora das células isentas."""
+    rules = RuleSet.compile(tiles)
+    levels = np.abs(refined[..., np.newaxis] - rules.values).argmin(axis=-1)
+    height, width = levels.shape
+    count = 0
+    for d, (_, dx, dy) in enumerate(DIRECTIONS):
+        for y in range(height):
+            for x in range(width):
+                ny, nx = y + dy, x + dx
+                if not (0 <= nx < width and 0 <= ny < height) or exempt[y, x] or exempt[ny, nx]:
+                    continue
+                count += not rules.compatible[d][levels[y, x]] >> levels[ny, nx] & 1
+    return count
+
+def test_refine_layout_completes_on_realistic_layouts():
+    for seed in range(5):
+        layout = _smooth_layout(seed)
+        tiles = MapElements().convert_to_tiles(layout)
+        rules = RuleSet.compile(tiles)
+        structural = np.array([all(allowed == [name] for allowed in tiles[name]['constraints'].values())
+                               for name in rules.tile_names])
+        levels = np.abs(layout[..., np.newaxis] - rules.values).argmin(axis=-1)
+        pinned = structural[levels]
+
+        refined, complete = refine_layout(layout, tiles, seed=seed, return_status=True)
+
+        assert complete
+        # Regiões estruturais mantidas e regras válidas entre as demais células
+        np.testing.assert_array_equal(refined[pinned], rules.values[levels][pinned])
+        assert _violations(refined, tiles, pinned) == 0